@@ -1,16 +1,30 @@
 """Base client interface for LLM click prediction."""
 
+import asyncio
+import functools
+import hashlib
 import json
 import os
 import re
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from . import response_cache
+from .fast_response_parser import parse_click_array
+
+
+def _whole(x: Any) -> Any:
+    """Round a numeric value to an int for prompt rows, passing through non-numbers."""
+    return round(x) if isinstance(x, (int, float)) else x
 
 
 def _compact_profile_str(idx: int, p: Dict[str, Any]) -> str:
     """Serialize a profile into a compact pipe-delimited line.
 
     The columns are: index|gender|age|region|occupation|salary|liability|married|health|illness.
+    Money amounts are rounded to whole units to keep the row short in tokens.
 
     Args:
         idx: Row index of the profile.
@@ -24,24 +38,24 @@ def _compact_profile_str(idx: int, p: Dict[str, Any]) -> str:
     health = 1 if p.get("health_status") else 0
     return (
         f"{idx}|{p.get('gender')}|{p.get('age')}|{p.get('region')}|"
-        f"{p.get('occupation')}|{p.get('annual_salary')}|{p.get('liability_status')}|"
+        f"{p.get('occupation')}|{_whole(p.get('annual_salary'))}|{_whole(p.get('liability_status'))}|"
         f"{married}|{health}|{illness}"
     )
 
 
-def _build_prompt(ad_text: str, profiles: List[Dict[str, Any]], ad_platform: str = "facebook") -> str:
-    """Compose the LLM prompt for batched binary click decisions.
+def _build_context(ad_text: str, ad_platform: str = "facebook") -> str:
+    """Compose the stable part of the prompt shared by every chunk of an ad.
 
-    The prompt includes the ad text, platform context, concise profile rows, and strict
-    instructions to return a JSON array of 0/1 integers only.
+    Includes the task statement, platform context, the ad text and the output
+    rules. Keeping this prefix identical across chunks lets providers serve it
+    from their prompt cache.
 
     Args:
         ad_text: The advertisement copy to evaluate.
-        profiles: List of identity profiles.
         ad_platform: Platform where the ad is shown (facebook, tiktok, amazon).
 
     Returns:
-        A single prompt string.
+        The prompt prefix string.
     """
     # Platform-specific context
     platform_contexts = {
@@ -64,20 +78,94 @@ def _build_prompt(ad_text: str, profiles: List[Dict[str, Any]], ad_platform: str
         "- 1 means 'would click', 0 means 'would not click'.\n"
         "- Consider the platform context when making decisions.\n"
     )
-    cols = (
-        "\n\nProfiles (index|gender|age|region|occupation|salary|liability|married|health|illness):\n"
-    )
-    lines = [
+    return header + ad_text + rules
+
+
+def _force_mock_enabled() -> bool:
+    """Return True when ``WISTERIA_FORCE_MOCK`` asks for mock predictions everywhere."""
+    return os.getenv("WISTERIA_FORCE_MOCK", "").strip().lower() in ("1", "true", "yes", "on")
+
+
+# Shared by every request; provider SDKs serialise messages without mutating them
+_SYSTEM_MESSAGE = {"role": "system", "content": "You are a precise decision engine that outputs strict JSON."}
+
+
+_PROFILES_HEADER = (
+    "\n\nProfiles (index|gender|age|region|occupation|salary|liability|married|health|illness):\n"
+)
+
+
+def _build_profiles_block(profiles: List[Dict[str, Any]]) -> str:
+    """Compose the per-chunk part of the prompt listing the profiles.
+
+    Args:
+        profiles: List of identity profiles.
+
+    Returns:
+        Column header followed by one compact row per profile.
+    """
+    return _PROFILES_HEADER + "\n".join([
         _compact_profile_str(i, p) for i, p in enumerate(profiles)
-    ]
-    return header + ad_text + rules + cols + "\n".join(lines)
+    ])
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_prompt_builder(ad_text: str, ad_platform: str = "facebook") -> Callable[[List[Dict[str, Any]]], Tuple[str, str]]:
+    """Return a prompt builder specialised for one ad and platform.
+
+    The stable context is rendered once and baked into the returned closure,
+    so building the prompt for each chunk only formats the profile rows.
+
+    Args:
+        ad_text: The advertisement copy to evaluate.
+        ad_platform: Platform where the ad is shown (facebook, tiktok, amazon).
+
+    Returns:
+        Callable mapping a chunk of profiles to ``(context, profiles_block)``.
+    """
+    context = _build_context(ad_text, ad_platform)
+
+    def build(profiles: List[Dict[str, Any]]) -> Tuple[str, str]:
+        return context, _build_profiles_block(profiles)
+
+    return build
+
+
+def _build_prompt(ad_text: str, profiles: List[Dict[str, Any]], ad_platform: str = "facebook") -> str:
+    """Compose the LLM prompt for batched binary click decisions.
+
+    The prompt includes the ad text, platform context, concise profile rows, and strict
+    instructions to return a JSON array of 0/1 integers only.
+
+    Args:
+        ad_text: The advertisement copy to evaluate.
+        profiles: List of identity profiles.
+        ad_platform: Platform where the ad is shown (facebook, tiktok, amazon).
+
+    Returns:
+        A single prompt string.
+    """
+    return "".join(_compile_prompt_builder(ad_text, ad_platform)(profiles))
+
+
+def prompt_cache_key(ad_text: str, ad_platform: str = "facebook") -> str:
+    """Return a stable key identifying the shared prompt prefix for an ad.
+
+    Args:
+        ad_text: The advertisement copy to evaluate.
+        ad_platform: Platform where the ad is shown.
+
+    Returns:
+        Hex digest of the prompt prefix.
+    """
+    return hashlib.md5(_build_context(ad_text, ad_platform).encode("utf-8")).hexdigest()
 
 
 def _try_parse_json_array(s: str) -> Optional[List[int]]:
     """Extract a JSON array of integers from a model response string.
 
-    Tries direct JSON parsing, then a tolerant regex extraction if wrapped in
-    extra text.
+    Tries the schema-specific fast parser, then direct JSON parsing, then a
+    tolerant regex extraction if wrapped in extra text.
 
     Args:
         s: Raw response text.
@@ -85,6 +173,9 @@ def _try_parse_json_array(s: str) -> Optional[List[int]]:
     Returns:
         List of integers on success, otherwise ``None``.
     """
+    fast = parse_click_array(s)
+    if fast is not None:
+        return fast
     try:
         data = json.loads(s)
         if isinstance(data, list) and all(isinstance(x, int) for x in data):
@@ -102,6 +193,23 @@ def _try_parse_json_array(s: str) -> Optional[List[int]]:
     return None
 
 
+@functools.lru_cache(maxsize=1)
+def _http2_available() -> bool:
+    """Return True if the ``h2`` package needed for HTTP/2 in httpx is installed."""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+@functools.lru_cache(maxsize=1)
+def _shared_ssl_context():
+    """Return one SSL context reused by every HTTP client in the process."""
+    import httpx
+    return httpx.create_ssl_context()
+
+
 def _print_fallback(msg: str) -> None:
     """Print a concise notice when falling back to the mock model.
 
@@ -180,7 +288,7 @@ def _mock_click_prob(ad_text: str, p: Dict[str, Any]) -> float:
     return max(0.0, min(1.0, _sigmoid(z)))
 
 
-def _mock_predict(ad_text: str, profiles: List[Dict[str, Any]]) -> List[int]:
+def _mock_predict(ad_text: str, profiles: List[Dict[str, Any]]) -> np.ndarray:
     """Generate binary click predictions using the mock heuristic.
 
     Uses a fixed RNG seed for reproducibility across runs.
@@ -190,32 +298,87 @@ def _mock_predict(ad_text: str, profiles: List[Dict[str, Any]]) -> List[int]:
         profiles: List of profiles to score.
 
     Returns:
-        List of 0/1 integers aligned with ``profiles``.
+        ``np.int8`` array of 0/1 values aligned with ``profiles``.
     """
     import random
     rnd = random.Random(1337)
-    clicks = []
-    for p in profiles:
-        prob = _mock_click_prob(ad_text, p)
-        clicks.append(1 if rnd.random() < prob else 0)
-    return clicks
+    return np.fromiter(
+        (_mock_click_prob(ad_text, p) > rnd.random() for p in profiles),
+        dtype=np.int8,
+        count=len(profiles),
+    )
 
 
 class BaseLLMClient(ABC):
     """Abstract base class for LLM clients."""
     
-    def __init__(self, model: str, api_key: str = None):
+    # Async API calls in flight at once per client; subclasses tune this to
+    # the provider's rate limits
+    DEFAULT_MAX_CONCURRENCY = 16
+    
+    def __init__(self, model: str, api_key: str = None, max_concurrency: Optional[int] = None):
         """Initialize base client.
         
         Args:
             model: Model name to use.
             api_key: API key override.
+            max_concurrency: Maximum concurrent async API calls (defaults to
+                ``DEFAULT_MAX_CONCURRENCY``).
         """
         self.model = model
         self.api_key = api_key
         self.provider_name = "base"
         self.env_key_name = "API_KEY"
+        self.max_concurrency = max(1, max_concurrency or self.DEFAULT_MAX_CONCURRENCY)
+        # Serve every chunk from the mock model without building prompts
+        self._mock_only = _force_mock_enabled()
+        # SDK clients, created lazily by subclasses and reused across chunks
+        self._sync_client = None
+        self._async_client = None
+        self._async_loop = None
+        self._sem = None
+        self._sem_loop = None
+    
+    def _concurrency_limit(self) -> asyncio.Semaphore:
+        """Semaphore bounding in-flight async API calls on the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._sem is None or self._sem_loop is not loop:
+            self._sem = asyncio.Semaphore(self.max_concurrency)
+            self._sem_loop = loop
+        return self._sem
+    
+    def close(self) -> None:
+        """Close the cached sync SDK client and drop the async one.
+
+        The async client can only be closed on its event loop; use
+        :meth:`aclose` from async code to release its pool as well.
+        """
+        client, self._sync_client = self._sync_client, None
+        self._async_client, self._async_loop = None, None
+        if client is not None:
+            client.close()
     
+    async def aclose(self) -> None:
+        """Close the cached sync and async SDK clients and their connection pools, if any."""
+        client, self._async_client, self._async_loop = self._async_client, None, None
+        self.close()
+        if client is not None:
+            await client.close()
+    
+    def _http_client_options(self) -> Dict[str, Any]:
+        """Keyword arguments for the httpx clients shared across chunk calls.
+
+        HTTP/2 is enabled when the optional ``h2`` package is installed, so
+        concurrent chunks multiplex over one TLS connection.
+        """
+        import httpx
+        return {
+            "http2": _http2_available(),
+            "limits": httpx.Limits(max_connections=256, max_keepalive_connections=256),
+            "timeout": httpx.Timeout(60.0, connect=5.0),
+            "verify": _shared_ssl_context(),
+        }
+
     def has_api_key(self) -> bool:
         """Check if API key is available."""
         key = self.api_key or os.getenv(self.env_key_name)
@@ -224,52 +387,98 @@ class BaseLLMClient(ABC):
     def _build_prompt(self, ad_text: str, profiles: List[Dict[str, Any]], ad_platform: str = "facebook") -> str:
         """Build prompt for the profiles."""
         return _build_prompt(ad_text, profiles, ad_platform)
+
+    def _build_prompt_parts(self, ad_text: str, profiles: List[Dict[str, Any]], ad_platform: str = "facebook") -> Tuple[str, str]:
+        """Build the prompt as ``(context, profiles_block)``.
+
+        ``context`` is identical for every chunk of the same ad and platform;
+        ``context + profiles_block`` equals :meth:`_build_prompt`.
+        """
+        return _compile_prompt_builder(ad_text, ad_platform)(profiles)
     
-    def _fallback_to_mock(self, ad_text: str, chunk: List[Dict[str, Any]], reason: str) -> List[int]:
+    def _fallback_to_mock(self, ad_text: str, chunk: List[Dict[str, Any]], reason: str) -> np.ndarray:
         """Fallback to mock prediction with logging."""
         _print_fallback(f"{reason}; using mock for this chunk.")
         return _mock_predict(ad_text, chunk)
     
-    def _parse_and_validate_response(self, content: str, chunk: List[Dict[str, Any]], ad_text: str, provider_name: str) -> List[int]:
-        """Parse and validate LLM response."""
+    def _cache_key(self, prompt: str) -> str:
+        """Return the response-cache key for ``prompt`` on this provider/model."""
+        return response_cache.make_key(self.provider_name, self.model, prompt)
+
+    async def _read_stream(self, stream) -> str:
+        """Collect streamed completion content, stopping once the array is complete.
+
+        As soon as the accumulated text parses as a click array the stream is
+        closed, so the remaining tokens are neither awaited nor buffered.
+
+        Args:
+            stream: Async iterator of chat completion chunks.
+
+        Returns:
+            The response text received so far.
+        """
+        parts: List[str] = []
+        async for event in stream:
+            if not event.choices:
+                continue
+            delta = event.choices[0].delta.content
+            if not delta:
+                continue
+            parts.append(delta)
+            if "]" in delta:
+                content = "".join(parts)
+                if parse_click_array(content) is not None:
+                    await stream.close()
+                    return content
+        return "".join(parts)
+
+    def _parse_and_validate_response(self, content: str, chunk: List[Dict[str, Any]], ad_text: str, provider_name: str, cache_key: Optional[str] = None) -> np.ndarray:
+        """Parse and validate LLM response.
+
+        The result is an ``np.int8`` array of 0/1 values, padded with zeros or
+        trimmed to ``len(chunk)``. When ``cache_key`` is given, successfully
+        parsed content is stored in the response cache under that key.
+        """
         arr = _try_parse_json_array(content or "")
         if arr is None:
             _print_fallback(f"{provider_name} output parse failed; using mock for this chunk.")
-            arr = _mock_predict(ad_text, chunk)
-        
-        # Pad or trim to correct length
-        if len(arr) != len(chunk):
-            if len(arr) < len(chunk):
-                arr = arr + [0] * (len(chunk) - len(arr))
-            else:
-                arr = arr[: len(chunk)]
+            return _mock_predict(ad_text, chunk)
+        if cache_key is not None:
+            response_cache.put(cache_key, content)
         
-        return [1 if int(x) else 0 for x in arr]
+        clicks = np.zeros(len(chunk), dtype=np.int8)
+        n = min(len(arr), len(chunk))
+        clicks[:n] = np.fromiter((1 if int(x) else 0 for x in arr[:n]), dtype=np.int8, count=n)
+        return clicks
     
     @abstractmethod
-    def predict_chunk(self, ad_text: str, chunk: List[Dict[str, Any]], ad_platform: str = "facebook") -> List[int]:
+    def predict_chunk(self, ad_text: str, chunk: List[Dict[str, Any]], ad_platform: str = "facebook", prompt_cache_key: Optional[str] = None) -> np.ndarray:
         """Predict clicks for a chunk of profiles synchronously.
         
         Args:
             ad_text: Advertisement text.
             chunk: List of profile dictionaries.
             ad_platform: Platform where ad is shown.
+            prompt_cache_key: Optional key shared by all chunks of the same ad,
+                used for provider-side prompt caching.
             
         Returns:
-            List of 0/1 click predictions.
+            ``np.int8`` array of 0/1 click predictions.
         """
         pass
     
     @abstractmethod
-    async def predict_chunk_async(self, ad_text: str, chunk: List[Dict[str, Any]], ad_platform: str = "facebook") -> List[int]:
+    async def predict_chunk_async(self, ad_text: str, chunk: List[Dict[str, Any]], ad_platform: str = "facebook", prompt_cache_key: Optional[str] = None) -> np.ndarray:
         """Predict clicks for a chunk of profiles asynchronously.
         
         Args:
             ad_text: Advertisement text.
             chunk: List of profile dictionaries.
             ad_platform: Platform where ad is shown.
+            prompt_cache_key: Optional key shared by all chunks of the same ad,
+                used for provider-side prompt caching.
             
         Returns:
-            List of 0/1 click predictions.
+            ``np.int8`` array of 0/1 click predictions.
         """
         pass
\ No newline at end of file
@@ -1,22 +1,34 @@
 """DeepSeek client implementation for LLM click prediction."""
 
+import asyncio
 import os
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
-from .base_client import BaseLLMClient
+import numpy as np
+
+try:
+    import httpx
+    from openai import AsyncOpenAI, OpenAI
+    OPENAI_AVAILABLE = True
+except ImportError:
+    OPENAI_AVAILABLE = False
+
+from . import response_cache
+from .base_client import _SYSTEM_MESSAGE, BaseLLMClient, _mock_predict
 
 
 class DeepSeekClient(BaseLLMClient):
     """DeepSeek client for click prediction."""
     
-    def __init__(self, model: str = "deepseek-chat", api_key: str = None):
+    def __init__(self, model: str = "deepseek-chat", api_key: str = None, max_concurrency: Optional[int] = None):
         """Initialize DeepSeek client.
         
         Args:
             model: Model name to use.
             api_key: API key override (else read from DEEPSEEK_API_KEY env var).
+            max_concurrency: Maximum concurrent async API calls.
         """
-        super().__init__(model, api_key)
+        super().__init__(model, api_key, max_concurrency)
         self.provider_name = "deepseek"
         self.env_key_name = "DEEPSEEK_API_KEY"
         self.base_url = os.getenv("DEEPSEEK_API_BASE", "https://api.deepseek.com")
@@ -24,44 +36,77 @@ class DeepSeekClient(BaseLLMClient):
 
 
     def _get_client(self):
-        """Get synchronous OpenAI client configured for DeepSeek."""
-        try:
-            from openai import OpenAI
-            return OpenAI(
-                api_key=self.api_key or os.getenv(self.env_key_name),
-                base_url=self.base_url
-            )
-        except Exception as e:
-            raise ImportError(f"OpenAI import failed: {e}")
+        """Get synchronous OpenAI client configured for DeepSeek.
+
+        The client is created once and reused so chunks share its connection pool.
+        """
+        if self._sync_client is None:
+            if not OPENAI_AVAILABLE:
+                raise ImportError("OpenAI import failed: openai package not installed")
+            try:
+                self._sync_client = OpenAI(
+                    api_key=self.api_key or os.getenv(self.env_key_name),
+                    base_url=self.base_url,
+                    http_client=httpx.Client(**self._http_client_options())
+                )
+            except Exception as e:
+                raise ImportError(f"OpenAI import failed: {e}")
+        return self._sync_client
 
     async def _get_async_client(self):
-        """Get asynchronous OpenAI client configured for DeepSeek."""
-        try:
-            from openai import AsyncOpenAI
-            return AsyncOpenAI(
-                api_key=self.api_key or os.getenv(self.env_key_name),
-                base_url=self.base_url
-            )
-        except Exception as e:
-            raise ImportError(f"AsyncOpenAI import failed: {e}")
+        """Get asynchronous OpenAI client configured for DeepSeek.
+
+        The client is reused for all chunks awaited on the same event loop.
+        """
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            if not OPENAI_AVAILABLE:
+                raise ImportError("AsyncOpenAI import failed: openai package not installed")
+            try:
+                self._async_client = AsyncOpenAI(
+                    api_key=self.api_key or os.getenv(self.env_key_name),
+                    base_url=self.base_url,
+                    http_client=httpx.AsyncClient(**self._http_client_options())
+                )
+            except Exception as e:
+                raise ImportError(f"AsyncOpenAI import failed: {e}")
+            self._async_loop = loop
+        return self._async_client
     
 
 
-    def _create_messages(self, prompt: str) -> List[Dict[str, str]]:
-        """Create message format for DeepSeek API."""
+    def _create_messages(self, context: str, profiles_block: str) -> List[Dict[str, str]]:
+        """Create message format for DeepSeek API.
+
+        The system message and ad ``context`` come first so every chunk of the
+        same ad shares a cacheable prefix; only the last message varies.
+        """
         return [
-            {"role": "system", "content": "You are a precise decision engine that outputs strict JSON."},
-            {"role": "user", "content": prompt}
+            _SYSTEM_MESSAGE,
+            {"role": "user", "content": context},
+            {"role": "user", "content": profiles_block}
         ]
     
 
 
-    def predict_chunk(self, ad_text: str, chunk: List[Dict[str, Any]], ad_platform: str = "facebook") -> List[int]:
-        """Synchronous prediction for a chunk of profiles."""
+    def predict_chunk(self, ad_text: str, chunk: List[Dict[str, Any]], ad_platform: str = "facebook", prompt_cache_key: Optional[str] = None) -> np.ndarray:
+        """Synchronous prediction for a chunk of profiles.
+
+        DeepSeek caches shared prompt prefixes on its side automatically, so
+        ``prompt_cache_key`` is accepted for interface parity but not sent.
+        """
+        if self._mock_only:
+            return _mock_predict(ad_text, chunk)
         # Check API key first
         if not self.has_api_key():
             return self._fallback_to_mock(ad_text, chunk, "DeepSeek API key missing")
         
+        context, profiles_block = self._build_prompt_parts(ad_text, chunk, ad_platform)
+        cache_key = self._cache_key(context + profiles_block)
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            return self._parse_and_validate_response(cached, chunk, ad_text, "DeepSeek")
+
         try:
             client = self._get_client()
         except ImportError:
@@ -69,11 +114,10 @@ class DeepSeekClient(BaseLLMClient):
         except Exception:
             return self._fallback_to_mock(ad_text, chunk, "DeepSeek client init failed")
         
-        prompt = self._build_prompt(ad_text, chunk, ad_platform)
         try:
             response = client.chat.completions.create(
                 model=self.model or "deepseek-chat",
-                messages=self._create_messages(prompt),
+                messages=self._create_messages(context, profiles_block),
                 temperature=0.0,
                 stream=False
             )
@@ -81,14 +125,25 @@ class DeepSeekClient(BaseLLMClient):
         except Exception:
             return self._fallback_to_mock(ad_text, chunk, "DeepSeek API call failed")
         
-        return self._parse_and_validate_response(content, chunk, ad_text, "DeepSeek")
+        return self._parse_and_validate_response(content, chunk, ad_text, "DeepSeek", cache_key)
 
-    async def predict_chunk_async(self, ad_text: str, chunk: List[Dict[str, Any]], ad_platform: str = "facebook") -> List[int]:
-        """Asynchronous prediction for a chunk of profiles."""
+    async def predict_chunk_async(self, ad_text: str, chunk: List[Dict[str, Any]], ad_platform: str = "facebook", prompt_cache_key: Optional[str] = None) -> np.ndarray:
+        """Asynchronous prediction for a chunk of profiles.
+
+        See :meth:`predict_chunk` regarding ``prompt_cache_key``.
+        """
+        if self._mock_only:
+            return _mock_predict(ad_text, chunk)
         # Check API key first
         if not self.has_api_key():
             return self._fallback_to_mock(ad_text, chunk, "DeepSeek API key missing")
         
+        context, profiles_block = self._build_prompt_parts(ad_text, chunk, ad_platform)
+        cache_key = self._cache_key(context + profiles_block)
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            return self._parse_and_validate_response(cached, chunk, ad_text, "AsyncDeepSeek")
+
         try:
             client = await self._get_async_client()
         except ImportError:
@@ -96,16 +151,16 @@ class DeepSeekClient(BaseLLMClient):
         except Exception:
             return self._fallback_to_mock(ad_text, chunk, "AsyncDeepSeek client init failed")
         
-        prompt = self._build_prompt(ad_text, chunk, ad_platform)
         try:
-            response = await client.chat.completions.create(
-                model=self.model or "deepseek-chat",
-                messages=self._create_messages(prompt),
-                temperature=0.0,
-                stream=False
-            )
-            content = response.choices[0].message.content
+            async with self._concurrency_limit():
+                response = await client.chat.completions.create(
+                    model=self.model or "deepseek-chat",
+                    messages=self._create_messages(context, profiles_block),
+                    temperature=0.0,
+                    stream=True
+                )
+                content = await self._read_stream(response)
         except Exception:
             return self._fallback_to_mock(ad_text, chunk, "AsyncDeepSeek API call failed")
         
-        return self._parse_and_validate_response(content, chunk, ad_text, "AsyncDeepSeek")
\ No newline at end of file
+        return self._parse_and_validate_response(content, chunk, ad_text, "AsyncDeepSeek", cache_key)
\ No newline at end of file
@@ -0,0 +1,48 @@
+"""Fast parsing of LLM click responses.
+
+Models are asked to return a bare JSON array of 0/1 integers. This module
+recognises that shape directly instead of going through a generic JSON
+parser, and uses ``msgspec`` for typed decoding when it is installed.
+"""
+
+from typing import List, Optional
+
+try:
+    import msgspec
+    _DECODER = msgspec.json.Decoder(List[int])
+    MSGSPEC_AVAILABLE = True
+except ImportError:
+    MSGSPEC_AVAILABLE = False
+
+# Characters allowed between the brackets besides the 0/1 digits themselves
+_SEPARATORS = str.maketrans("", "", " \t\r\n,")
+
+
+def parse_click_array(content: str) -> Optional[List[int]]:
+    """Parse a response that is exactly a JSON array of integers.
+
+    The common ``[1,0,...]`` shape is recognised with string translation
+    alone; other integer arrays go through ``msgspec`` when available.
+
+    Args:
+        content: Raw response text.
+
+    Returns:
+        List of integers on success, otherwise ``None`` so callers can fall
+        back to tolerant parsing.
+    """
+    body = content.strip()
+    if body[:1] == "[" and body[-1:] == "]":
+        digits = body[1:-1].translate(_SEPARATORS)
+        # Every element must be a single 0/1 digit separated by one comma
+        if digits and not digits.strip("01") and body.count(",") + 1 == len(digits):
+            return [1 if c == "1" else 0 for c in digits]
+    if MSGSPEC_AVAILABLE:
+        try:
+            return _DECODER.decode(content)
+        except Exception:
+            return None
+    return None
+
+
+__all__ = ["parse_click_array"]
@@ -2,11 +2,17 @@ import asyncio
 import json
 import os
 import re
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Any, Dict, Iterable, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
 
 from .openai_client import OpenAIClient
 from .deepseek_client import DeepSeekClient
+from .mock_client import MockClient
+from .base_client import BaseLLMClient, _force_mock_enabled, prompt_cache_key
 # from .template_client import TemplateClient  # TODO: Add other clients as needed
 
 
@@ -28,9 +34,107 @@ def _chunked(seq: List[Any], n: int) -> Iterable[List[Any]]:
 CLIENT_REGISTRY = {
     "openai": OpenAIClient,
     "deepseek": DeepSeekClient,
+    "mock": MockClient,
     # "template": TemplateClient,  # TODO: Add other clients here
 }
 
+# Maximum number of shared provider clients kept in the registry; the least
+# recently used one is dropped when a new client would exceed it
+SHARED_CLIENT_CACHE_SIZE = int(os.getenv("SHARED_CLIENT_CACHE_SIZE", "16"))
+
+# Client instances shared by every predictor with the same settings, so SDK
+# connection pools outlive a single prediction request. Only clients using
+# the environment API key are shared; per-request keys are never retained.
+# Each shared client counts the predictors holding it: an evicted client is
+# closed once it is idle, by the last predictor to release it.
+_SHARED_CLIENTS: "OrderedDict[Tuple[str, str], BaseLLMClient]" = OrderedDict()
+_SHARED_CLIENT_USERS: Dict[BaseLLMClient, int] = {}
+_EVICTED_CLIENTS: set = set()
+_SHARED_CLIENTS_LOCK = threading.Lock()
+_PENDING_CLOSES: set = set()
+
+
+def _close_evicted(client: BaseLLMClient) -> None:
+    """Close an idle evicted client without blocking the caller."""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        client.close()
+        return
+    task = loop.create_task(client.aclose())
+    _PENDING_CLOSES.add(task)
+    task.add_done_callback(_PENDING_CLOSES.discard)
+
+
+def _client_max_concurrency(provider: str) -> Optional[int]:
+    """Per-client API call limit from ``<PROVIDER>_MAX_CONCURRENCY``, if set.
+
+    ``None`` leaves the client's ``DEFAULT_MAX_CONCURRENCY`` in place (64 for
+    OpenAI, 16 for DeepSeek).
+    """
+    value = os.getenv(f"{provider.upper()}_MAX_CONCURRENCY")
+    return int(value) if value else None
+
+
+def _new_client(provider: str, model: str, api_key: Optional[str] = None) -> BaseLLMClient:
+    """Construct a client for ``provider`` with the server's concurrency limit."""
+    return CLIENT_REGISTRY[provider](model=model, api_key=api_key, max_concurrency=_client_max_concurrency(provider))
+
+
+def _acquire_shared_client(provider: str, model: str) -> BaseLLMClient:
+    """Return the shared client for ``(provider, model)`` and count the caller as a user.
+
+    Every call must be paired with :func:`_release_shared_client`. Clients
+    evicted from the registry stay open while they have users.
+    """
+    key = (provider, model)
+    idle = []
+    with _SHARED_CLIENTS_LOCK:
+        client = _SHARED_CLIENTS.get(key)
+        if client is None:
+            client = _new_client(provider, model)
+            _SHARED_CLIENTS[key] = client
+        else:
+            _SHARED_CLIENTS.move_to_end(key)
+        _SHARED_CLIENT_USERS[client] = _SHARED_CLIENT_USERS.get(client, 0) + 1
+        while len(_SHARED_CLIENTS) > max(1, SHARED_CLIENT_CACHE_SIZE):
+            old = _SHARED_CLIENTS.popitem(last=False)[1]
+            if old in _SHARED_CLIENT_USERS:
+                _EVICTED_CLIENTS.add(old)
+            else:
+                idle.append(old)
+    for old in idle:
+        _close_evicted(old)
+    return client
+
+
+def _release_shared_client(client: BaseLLMClient) -> bool:
+    """Drop one user of ``client``; return True if the caller must now close it.
+
+    That is the case when the client was evicted and this was its last user.
+    """
+    with _SHARED_CLIENTS_LOCK:
+        users = _SHARED_CLIENT_USERS.get(client, 0) - 1
+        if users > 0:
+            _SHARED_CLIENT_USERS[client] = users
+            return False
+        _SHARED_CLIENT_USERS.pop(client, None)
+        if client in _EVICTED_CLIENTS:
+            _EVICTED_CLIENTS.discard(client)
+            return True
+        return False
+
+
+async def aclose_shared_clients() -> None:
+    """Close and forget all shared clients, e.g. on application shutdown."""
+    with _SHARED_CLIENTS_LOCK:
+        clients = list(_SHARED_CLIENTS.values()) + list(_EVICTED_CLIENTS)
+        _SHARED_CLIENTS.clear()
+        _EVICTED_CLIENTS.clear()
+        _SHARED_CLIENT_USERS.clear()
+    for client in clients:
+        await client.aclose()
+
 
 def _print_fallback(msg: str) -> None:
     """Print a concise notice when falling back to the mock model.
@@ -44,7 +148,7 @@ def _print_fallback(msg: str) -> None:
         pass
 
 
-def _mock_predict(ad_text: str, profiles: List[Dict[str, Any]]) -> List[int]:
+def _mock_predict(ad_text: str, profiles: List[Dict[str, Any]]) -> np.ndarray:
     """Generate binary click predictions using the mock heuristic.
 
     Uses a fixed RNG seed for reproducibility across runs.
@@ -54,7 +158,7 @@ def _mock_predict(ad_text: str, profiles: List[Dict[str, Any]]) -> List[int]:
         profiles: List of profiles to score.
 
     Returns:
-        List of 0/1 integers aligned with ``profiles``.
+        ``np.int8`` array of 0/1 values aligned with ``profiles``.
     """
     # Import mock prediction logic from base_client to avoid duplication
     from .base_client import _mock_predict as base_mock_predict
@@ -75,7 +179,9 @@ class LLMClickPredictor:
         batch_size: Number of profiles per request.
         use_mock: If True, always use the mock predictor.
         use_async: If True, use async parallel processing; if False, use sequential processing.
-        api_key: Optional API key override (else read from env).
+        api_key: Optional API key override (else read from env); the predictor
+            then gets a private client, released by :meth:`aclose`.
+        max_concurrency: Maximum number of chunk requests in flight at once in async mode.
     """
     provider: str = "openai"
     model: str = "gpt-4o-mini"
@@ -83,31 +189,55 @@ class LLMClickPredictor:
     use_mock: bool = False
     use_async: bool = True
     api_key: Optional[str] = None
+    max_concurrency: int = 64
 
     def __post_init__(self):
         """Initialize the appropriate client after dataclass creation."""
         if self.provider not in CLIENT_REGISTRY:
             raise ValueError(f"Unknown provider '{self.provider}'. Available providers: {list(CLIENT_REGISTRY.keys())}")
         
-        client_class = CLIENT_REGISTRY[self.provider]
-        self._client = client_class(
-            model=self.model,
-            api_key=self.api_key
-        )
+        # Mock runs share one lightweight mock client instead of a provider SDK client
+        self._force_mock = self.use_mock or _force_mock_enabled()
+        self._closed = False
+        # A per-request API key gets a private client, closed by aclose()
+        self._owns_client = self.api_key is not None and not self._force_mock
+        if self._force_mock:
+            self._client = _acquire_shared_client("mock", "mock")
+        elif self._owns_client:
+            self._client = _new_client(self.provider, self.model, self.api_key)
+        else:
+            self._client = _acquire_shared_client(self.provider, self.model)
+
+    async def aclose(self) -> None:
+        """Release the predictor's client; the predictor cannot be used afterwards.
+
+        A private client (``api_key`` given) is closed. A shared client stays
+        open for other predictors unless it was evicted from the registry and
+        this was its last user; see also :func:`aclose_shared_clients`.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        if self._owns_client or _release_shared_client(self._client):
+            await self._client.aclose()
 
     def _use_real(self) -> bool:
         """Return True if real API calls should be used.
 
-        Considers ``use_mock`` and whether the client is configured for real API calls.
+        Considers ``use_mock``, ``WISTERIA_FORCE_MOCK`` and whether the client
+        is configured for real API calls.
         """
-        if self.use_mock:
+        if self._closed:
+            raise RuntimeError("LLMClickPredictor is closed")
+        if self._force_mock:
             return False
         return self._client.has_api_key()
 
-    async def predict_clicks_async(self, ad_text: str, profiles: List[Dict[str, Any]], ad_platform: str = "facebook") -> List[int]:
+    async def predict_clicks_async(self, ad_text: str, profiles: List[Dict[str, Any]], ad_platform: str = "facebook") -> np.ndarray:
         """Async version: Predict binary clicks for all profiles with parallel processing.
 
-        Handles batching and runs API calls in parallel for better performance.
+        Handles batching and runs API calls in parallel for better performance,
+        with at most ``max_concurrency`` chunks in flight at once.
 
         Args:
             ad_text: Advertisement copy to evaluate.
@@ -115,32 +245,31 @@ class LLMClickPredictor:
             ad_platform: Platform where the ad is shown (facebook, tiktok, amazon).
 
         Returns:
-            List of 0/1 integers aligned with ``profiles`` order.
+            ``np.int8`` array of 0/1 values aligned with ``profiles`` order.
         """
-        clicks: List[int] = []
         if not profiles:
-            return clicks
+            return np.zeros(0, dtype=np.int8)
             
         if not self._use_real():
             # Print a reasoned fallback only if not explicitly in mock mode
-            if not self.use_mock:
+            if not self._force_mock:
                 _print_fallback(f"{self.provider} API not configured; using mock for all chunks.")
-            for chunk in _chunked(profiles, self.batch_size):
-                clicks.extend(_mock_predict(ad_text, chunk))
-            return clicks
+            return np.concatenate([_mock_predict(ad_text, chunk) for chunk in _chunked(profiles, self.batch_size)])
 
         # Real calls in parallel batches
         chunks = list(_chunked(profiles, self.batch_size))
-        tasks = [
-            self._client.predict_chunk_async(ad_text, chunk, ad_platform)
-            for chunk in chunks
-        ]
+        cache_key = prompt_cache_key(ad_text, ad_platform)
+        sem = asyncio.Semaphore(max(1, self.max_concurrency))
+
+        async def _bounded(chunk: List[Dict[str, Any]]) -> np.ndarray:
+            async with sem:
+                return await self._client.predict_chunk_async(ad_text, chunk, ad_platform, cache_key)
+
+        tasks = [_bounded(chunk) for chunk in chunks]
         results = await asyncio.gather(*tasks)
-        for result in results:
-            clicks.extend(result)
-        return clicks
+        return np.concatenate(results)
 
-    def predict_clicks(self, ad_text: str, profiles: List[Dict[str, Any]], ad_platform: str = "facebook") -> List[int]:
+    def predict_clicks(self, ad_text: str, profiles: List[Dict[str, Any]], ad_platform: str = "facebook") -> np.ndarray:
         """Predict binary clicks for all profiles.
 
         Handles batching and chooses between real API calls and the mock
@@ -152,28 +281,27 @@ class LLMClickPredictor:
             ad_platform: Platform where the ad is shown (facebook, tiktok, amazon).
 
         Returns:
-            List of 0/1 integers aligned with ``profiles`` order.
+            ``np.int8`` array of 0/1 values aligned with ``profiles`` order.
         """
-        clicks: List[int] = []
         if not profiles:
-            return clicks
+            return np.zeros(0, dtype=np.int8)
             
         if not self._use_real():
             # Print a reasoned fallback only if not explicitly in mock mode
-            if not self.use_mock:
+            if not self._force_mock:
                 _print_fallback(f"{self.provider} API not configured; using mock for all chunks.")
-            for chunk in _chunked(profiles, self.batch_size):
-                clicks.extend(_mock_predict(ad_text, chunk))
-            return clicks
+            return np.concatenate([_mock_predict(ad_text, chunk) for chunk in _chunked(profiles, self.batch_size)])
 
         # Real calls in batches
         # Use synchronous sequential processing only
-        for chunk in _chunked(profiles, self.batch_size):
-            clicks.extend(self._client.predict_chunk(ad_text, chunk, ad_platform))
-        return clicks
+        cache_key = prompt_cache_key(ad_text, ad_platform)
+        return np.concatenate([
+            self._client.predict_chunk(ad_text, chunk, ad_platform, cache_key)
+            for chunk in _chunked(profiles, self.batch_size)
+        ])
 
 
-async def predict_clicks_parallel(predictor: LLMClickPredictor, ad_text: str, profiles: List[Dict[str, Any]], ad_platform: str = "facebook") -> List[int]:
+async def predict_clicks_parallel(predictor: LLMClickPredictor, ad_text: str, profiles: List[Dict[str, Any]], ad_platform: str = "facebook") -> np.ndarray:
     """Convenience function to run async predictions in parallel.
     
     This is useful when you want to explicitly use async processing from 
@@ -186,9 +314,9 @@ async def predict_clicks_parallel(predictor: LLMClickPredictor, ad_text: str, pr
         ad_platform: Platform where the ad is shown (facebook, tiktok, amazon).
         
     Returns:
-        List of 0/1 integers aligned with ``profiles`` order.
+        ``np.int8`` array of 0/1 values aligned with ``profiles`` order.
     """
     return await predictor.predict_clicks_async(ad_text, profiles, ad_platform)
 
 
-__all__ = ["LLMClickPredictor", "predict_clicks_parallel"]
+__all__ = ["LLMClickPredictor", "predict_clicks_parallel", "aclose_shared_clients"]
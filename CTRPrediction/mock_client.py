@@ -0,0 +1,39 @@
+"""Mock client serving the heuristic click model.
+
+Used for mock requests and when ``WISTERIA_FORCE_MOCK`` is set, so those
+paths never build prompts, message lists or provider SDK clients.
+"""
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .base_client import BaseLLMClient, _mock_predict
+
+
+class MockClient(BaseLLMClient):
+    """Client that scores profiles with the mock heuristic and makes no API calls."""
+
+    def __init__(self, model: str = "mock", api_key: str = None, max_concurrency: Optional[int] = None):
+        """Initialize mock client.
+
+        Args:
+            model: Ignored; kept for registry compatibility.
+            api_key: Ignored; kept for registry compatibility.
+            max_concurrency: Ignored; kept for registry compatibility.
+        """
+        super().__init__(model, api_key, max_concurrency)
+        self.provider_name = "mock"
+        self._mock_only = True
+
+    def has_api_key(self) -> bool:
+        """The mock client never makes real API calls."""
+        return False
+
+    def predict_chunk(self, ad_text: str, chunk: List[Dict[str, Any]], ad_platform: str = "facebook", prompt_cache_key: Optional[str] = None) -> np.ndarray:
+        """Predict clicks for a chunk with the mock heuristic."""
+        return _mock_predict(ad_text, chunk)
+
+    async def predict_chunk_async(self, ad_text: str, chunk: List[Dict[str, Any]], ad_platform: str = "facebook", prompt_cache_key: Optional[str] = None) -> np.ndarray:
+        """Predict clicks for a chunk with the mock heuristic."""
+        return _mock_predict(ad_text, chunk)
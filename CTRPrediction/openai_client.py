@@ -1,9 +1,20 @@
 """OpenAI client implementation for LLM click prediction."""
 
+import asyncio
 import os
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
-from .base_client import BaseLLMClient
+import numpy as np
+
+try:
+    import httpx
+    from openai import AsyncOpenAI, OpenAI
+    OPENAI_AVAILABLE = True
+except ImportError:
+    OPENAI_AVAILABLE = False
+
+from . import response_cache
+from .base_client import _SYSTEM_MESSAGE, BaseLLMClient, _mock_predict
 
 
 
@@ -11,48 +22,93 @@ from .base_client import BaseLLMClient
 class OpenAIClient(BaseLLMClient):
     """OpenAI client for click prediction."""
     
-    def __init__(self, model: str = "gpt-4o-mini", api_key: str = None):
+    # Matches the predictor's default chunk fan-out; OpenAI tiers allow it
+    DEFAULT_MAX_CONCURRENCY = 64
+    
+    def __init__(self, model: str = "gpt-4o-mini", api_key: str = None, max_concurrency: Optional[int] = None):
         """Initialize OpenAI client.
         
         Args:
             model: Model name to use.
             api_key: API key override (else read from OPENAI_API_KEY env var).
+            max_concurrency: Maximum concurrent async API calls.
         """
-        super().__init__(model, api_key)
+        super().__init__(model, api_key, max_concurrency)
         self.provider_name = "openai"
         self.env_key_name = "OPENAI_API_KEY"
     
 
 
     def _get_client(self):
-        """Get synchronous OpenAI client."""
-        try:
-            from openai import OpenAI
-            return OpenAI(api_key=self.api_key or os.getenv(self.env_key_name))
-        except Exception as e:
-            raise ImportError(f"OpenAI import failed: {e}")
+        """Get synchronous OpenAI client.
+
+        The client is created once and reused so chunks share its connection pool.
+        """
+        if self._sync_client is None:
+            if not OPENAI_AVAILABLE:
+                raise ImportError("OpenAI import failed: openai package not installed")
+            try:
+                self._sync_client = OpenAI(
+                    api_key=self.api_key or os.getenv(self.env_key_name),
+                    http_client=httpx.Client(**self._http_client_options())
+                )
+            except Exception as e:
+                raise ImportError(f"OpenAI import failed: {e}")
+        return self._sync_client
     
     async def _get_async_client(self):
-        """Get asynchronous OpenAI client."""
-        try:
-            from openai import AsyncOpenAI
-            return AsyncOpenAI(api_key=self.api_key or os.getenv(self.env_key_name))
-        except Exception as e:
-            raise ImportError(f"AsyncOpenAI import failed: {e}")
+        """Get asynchronous OpenAI client.
+
+        The client is reused for all chunks awaited on the same event loop.
+        """
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            if not OPENAI_AVAILABLE:
+                raise ImportError("AsyncOpenAI import failed: openai package not installed")
+            try:
+                self._async_client = AsyncOpenAI(
+                    api_key=self.api_key or os.getenv(self.env_key_name),
+                    http_client=httpx.AsyncClient(**self._http_client_options())
+                )
+            except Exception as e:
+                raise ImportError(f"AsyncOpenAI import failed: {e}")
+            self._async_loop = loop
+        return self._async_client
     
 
 
-    def _create_messages(self, prompt: str) -> List[Dict[str, str]]:
-        """Create message format for OpenAI API."""
+    def _create_messages(self, context: str, profiles_block: str) -> List[Dict[str, str]]:
+        """Create message format for OpenAI API.
+
+        The system message and ad ``context`` come first so every chunk of the
+        same ad shares a cacheable prefix; only the last message varies.
+        """
         return [
-            {"role": "system", "content": "You are a precise decision engine that outputs strict JSON."},
-            {"role": "user", "content": prompt}
+            _SYSTEM_MESSAGE,
+            {"role": "user", "content": context},
+            {"role": "user", "content": profiles_block}
         ]
     
 
 
-    def predict_chunk(self, ad_text: str, chunk: List[Dict[str, Any]], ad_platform: str = "facebook") -> List[int]:
+    def _cache_extra_body(self, prompt_cache_key: Optional[str]) -> Optional[Dict[str, str]]:
+        """Extra request fields routing chunks of the same ad to OpenAI's prompt cache."""
+        if not prompt_cache_key:
+            return None
+        return {"prompt_cache_key": prompt_cache_key}
+    
+
+
+    def predict_chunk(self, ad_text: str, chunk: List[Dict[str, Any]], ad_platform: str = "facebook", prompt_cache_key: Optional[str] = None) -> np.ndarray:
         """Synchronous prediction for a chunk of profiles."""
+        if self._mock_only:
+            return _mock_predict(ad_text, chunk)
+        context, profiles_block = self._build_prompt_parts(ad_text, chunk, ad_platform)
+        cache_key = self._cache_key(context + profiles_block)
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            return self._parse_and_validate_response(cached, chunk, ad_text, "OpenAI")
+
         try:
             client = self._get_client()
         except ImportError:
@@ -60,12 +116,12 @@ class OpenAIClient(BaseLLMClient):
         except Exception:
             return self._fallback_to_mock(ad_text, chunk, "OpenAI client init failed")
         
-        prompt = self._build_prompt(ad_text, chunk, ad_platform)
         try:
             resp = client.chat.completions.create(
                 model=self.model,
-                messages=self._create_messages(prompt),
+                messages=self._create_messages(context, profiles_block),
                 temperature=0.0,
+                extra_body=self._cache_extra_body(prompt_cache_key),
             )
             content = resp.choices[0].message.content
         except Exception:
@@ -73,16 +129,24 @@ class OpenAIClient(BaseLLMClient):
             try:
                 r = client.responses.create(
                     model=self.model,
-                    input=prompt,
+                    input=context + profiles_block,
                 )
                 content = r.output_text
             except Exception:
                 return self._fallback_to_mock(ad_text, chunk, "OpenAI API call failed")
         
-        return self._parse_and_validate_response(content, chunk, ad_text, "OpenAI")
+        return self._parse_and_validate_response(content, chunk, ad_text, "OpenAI", cache_key)
     
-    async def predict_chunk_async(self, ad_text: str, chunk: List[Dict[str, Any]], ad_platform: str = "facebook") -> List[int]:
+    async def predict_chunk_async(self, ad_text: str, chunk: List[Dict[str, Any]], ad_platform: str = "facebook", prompt_cache_key: Optional[str] = None) -> np.ndarray:
         """Asynchronous prediction for a chunk of profiles."""
+        if self._mock_only:
+            return _mock_predict(ad_text, chunk)
+        context, profiles_block = self._build_prompt_parts(ad_text, chunk, ad_platform)
+        cache_key = self._cache_key(context + profiles_block)
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            return self._parse_and_validate_response(cached, chunk, ad_text, "AsyncOpenAI")
+
         try:
             client = await self._get_async_client()
         except ImportError:
@@ -90,15 +154,17 @@ class OpenAIClient(BaseLLMClient):
         except Exception:
             return self._fallback_to_mock(ad_text, chunk, "AsyncOpenAI client init failed")
         
-        prompt = self._build_prompt(ad_text, chunk, ad_platform)
         try:
-            resp = await client.chat.completions.create(
-                model=self.model,
-                messages=self._create_messages(prompt),
-                temperature=0.0,
-            )
-            content = resp.choices[0].message.content
+            async with self._concurrency_limit():
+                resp = await client.chat.completions.create(
+                    model=self.model,
+                    messages=self._create_messages(context, profiles_block),
+                    temperature=0.0,
+                    stream=True,
+                    extra_body=self._cache_extra_body(prompt_cache_key),
+                )
+                content = await self._read_stream(resp)
         except Exception:
             return self._fallback_to_mock(ad_text, chunk, "AsyncOpenAI API call failed")
         
-        return self._parse_and_validate_response(content, chunk, ad_text, "AsyncOpenAI")
\ No newline at end of file
+        return self._parse_and_validate_response(content, chunk, ad_text, "AsyncOpenAI", cache_key)
\ No newline at end of file
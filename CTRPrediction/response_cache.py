@@ -0,0 +1,65 @@
+"""In-process cache of raw LLM responses keyed by prompt.
+
+Predictions are requested with ``temperature=0.0``, so an identical
+(provider, model, prompt) triple yields the same answer. Clients consult this
+cache after building the prompt and skip the network call on a hit.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+# Maximum number of cached responses; set to 0 to disable caching
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "10000"))
+
+_cache: "OrderedDict[str, str]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def make_key(provider: str, model: str, prompt: str) -> str:
+    """Build the cache key for a prompt sent to a given provider/model.
+
+    Args:
+        provider: Provider identifier (e.g., "openai").
+        model: Model name.
+        prompt: Full prompt text.
+
+    Returns:
+        Hex digest identifying the request.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for part in (provider, model or "", prompt):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def get(key: str) -> Optional[str]:
+    """Return the cached response for ``key``, or ``None`` on a miss."""
+    with _lock:
+        content = _cache.get(key)
+        if content is not None:
+            _cache.move_to_end(key)
+        return content
+
+
+def put(key: str, content: str) -> None:
+    """Store ``content`` under ``key``, evicting the least recently used entry."""
+    if RESPONSE_CACHE_SIZE <= 0:
+        return
+    with _lock:
+        _cache[key] = content
+        _cache.move_to_end(key)
+        while len(_cache) > RESPONSE_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def clear() -> None:
+    """Drop all cached responses."""
+    with _lock:
+        _cache.clear()
+
+
+__all__ = ["make_key", "get", "put", "clear"]
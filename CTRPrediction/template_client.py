@@ -4,9 +4,14 @@ This is a template file showing how to implement a new LLM client.
 Replace 'Template' with your actual provider name and implement the required methods.
 """
 
+import asyncio
 import os
-from typing import Any, Dict, List
-from .base_client import BaseLLMClient
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from . import response_cache
+from .base_client import _SYSTEM_MESSAGE, BaseLLMClient, _mock_predict
 
 
 
@@ -17,14 +22,18 @@ class TemplateClient(BaseLLMClient):
     Examples: AnthropicClient, GeminiClient, CohereClient, etc.
     """
     
-    def __init__(self, model: str = "template-model", api_key: str = None):
+    # TODO: Set to the number of concurrent requests your provider's rate limits allow
+    DEFAULT_MAX_CONCURRENCY = 16
+    
+    def __init__(self, model: str = "template-model", api_key: str = None, max_concurrency: Optional[int] = None):
         """Initialize Template client.
         
         Args:
             model: Model name to use.
             api_key: API key override (else read from TEMPLATE_API_KEY env var).
+            max_concurrency: Maximum concurrent async API calls.
         """
-        super().__init__(model, api_key)
+        super().__init__(model, api_key, max_concurrency)
         self.provider_name = "template"  # TODO: Replace with actual provider name
         self.env_key_name = "TEMPLATE_API_KEY"  # TODO: Replace with actual env var name
         # TODO: Add any provider-specific configuration here
@@ -35,46 +44,63 @@ class TemplateClient(BaseLLMClient):
     def _get_client(self):
         """Get synchronous client for the LLM provider.
         
+        The client is created once and reused so chunks share its connection pool;
+        ``close()`` and ``aclose()`` call its ``close()`` method.
+        
         TODO: Implement client initialization for your provider.
         """
-        # TODO: Replace with actual client import and initialization
-        # try:
-        #     from template_sdk import TemplateClient
-        #     return TemplateClient(
-        #         api_key=self.api_key or os.getenv(self.env_key_name),
-        #         base_url=self.base_url
-        #     )
-        # except Exception as e:
-        #     raise ImportError(f"Template SDK import failed: {e}")
-        raise NotImplementedError("TODO: Implement _get_client method")
+        if self._sync_client is None:
+            # TODO: Replace with actual client import and initialization
+            # try:
+            #     from template_sdk import TemplateClient
+            #     self._sync_client = TemplateClient(
+            #         api_key=self.api_key or os.getenv(self.env_key_name),
+            #         base_url=self.base_url
+            #     )
+            # except Exception as e:
+            #     raise ImportError(f"Template SDK import failed: {e}")
+            raise NotImplementedError("TODO: Implement _get_client method")
+        return self._sync_client
     
 
 
     async def _get_async_client(self):
         """Get asynchronous client for the LLM provider.
         
+        The client is reused for all chunks awaited on the same event loop;
+        ``aclose()`` awaits its ``close()`` method (override ``aclose`` if your
+        SDK names it differently).
+        
         TODO: Implement async client initialization for your provider.
         """
-        # TODO: Replace with actual async client import and initialization
-        # try:
-        #     from template_sdk import AsyncTemplateClient
-        #     return AsyncTemplateClient(
-        #         api_key=self.api_key or os.getenv(self.env_key_name),
-        #         base_url=self.base_url
-        #     )
-        # except Exception as e:
-        #     raise ImportError(f"Async Template SDK import failed: {e}")
-        raise NotImplementedError("TODO: Implement _get_async_client method")
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            # TODO: Replace with actual async client import and initialization
+            # try:
+            #     from template_sdk import AsyncTemplateClient
+            #     self._async_client = AsyncTemplateClient(
+            #         api_key=self.api_key or os.getenv(self.env_key_name),
+            #         base_url=self.base_url
+            #     )
+            # except Exception as e:
+            #     raise ImportError(f"Async Template SDK import failed: {e}")
+            # self._async_loop = loop
+            raise NotImplementedError("TODO: Implement _get_async_client method")
+        return self._async_client
     
 
 
-    def _create_messages(self, prompt: str) -> List[Dict[str, str]]:
+    def _create_messages(self, context: str, profiles_block: str) -> List[Dict[str, str]]:
         """Create message format for the provider's API.
         
         TODO: Implement message formatting for your provider.
+        Keep the stable ``context`` ahead of the per-chunk ``profiles_block`` so
+        providers with prompt caching can reuse the shared prefix. The system
+        message is a shared constant rather than rebuilt per chunk.
         
         Args:
-            prompt: The formatted prompt string.
+            context: Prompt prefix shared by all chunks of the same ad.
+            profiles_block: Per-chunk profile rows.
             
         Returns:
             List of message dictionaries in provider's format.
@@ -85,21 +111,30 @@ class TemplateClient(BaseLLMClient):
         # - Anthropic: Different message structure
         # - Others: May use different field names or structures
         return [
-            {"role": "system", "content": "You are a precise decision engine that outputs strict JSON."},
-            {"role": "user", "content": prompt}
+            _SYSTEM_MESSAGE,
+            {"role": "user", "content": context},
+            {"role": "user", "content": profiles_block}
         ]
     
 
 
-    def predict_chunk(self, ad_text: str, chunk: List[Dict[str, Any]], ad_platform: str = "facebook") -> List[int]:
+    def predict_chunk(self, ad_text: str, chunk: List[Dict[str, Any]], ad_platform: str = "facebook", prompt_cache_key: Optional[str] = None) -> np.ndarray:
         """Synchronous prediction for a chunk of profiles.
         
         TODO: Implement synchronous API call for your provider.
         """
+        if self._mock_only:
+            return _mock_predict(ad_text, chunk)
         # Check API key first
         if not self.has_api_key():
             return self._fallback_to_mock(ad_text, chunk, f"{self.provider_name} API key missing")
         
+        context, profiles_block = self._build_prompt_parts(ad_text, chunk, ad_platform)
+        cache_key = self._cache_key(context + profiles_block)
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            return self._parse_and_validate_response(cached, chunk, ad_text, self.provider_name)
+
         # TODO: Implement actual client usage
         try:
             client = self._get_client()
@@ -108,7 +143,6 @@ class TemplateClient(BaseLLMClient):
         except Exception:
             return self._fallback_to_mock(ad_text, chunk, f"{self.provider_name} client init failed")
         
-        prompt = self._build_prompt(ad_text, chunk, ad_platform)
         try:
             # TODO: Replace with actual API call for your provider
             # Example for different providers:
@@ -123,19 +157,27 @@ class TemplateClient(BaseLLMClient):
         except Exception:
             return self._fallback_to_mock(ad_text, chunk, f"{self.provider_name} API call failed")
         
-        return self._parse_and_validate_response(content, chunk, ad_text, self.provider_name)
+        return self._parse_and_validate_response(content, chunk, ad_text, self.provider_name, cache_key)
     
 
 
-    async def predict_chunk_async(self, ad_text: str, chunk: List[Dict[str, Any]], ad_platform: str = "facebook") -> List[int]:
+    async def predict_chunk_async(self, ad_text: str, chunk: List[Dict[str, Any]], ad_platform: str = "facebook", prompt_cache_key: Optional[str] = None) -> np.ndarray:
         """Asynchronous prediction for a chunk of profiles.
         
         TODO: Implement asynchronous API call for your provider.
         """
+        if self._mock_only:
+            return _mock_predict(ad_text, chunk)
         # Check API key first
         if not self.has_api_key():
             return self._fallback_to_mock(ad_text, chunk, f"{self.provider_name} API key missing")
         
+        context, profiles_block = self._build_prompt_parts(ad_text, chunk, ad_platform)
+        cache_key = self._cache_key(context + profiles_block)
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            return self._parse_and_validate_response(cached, chunk, ad_text, f"Async{self.provider_name}")
+
         # TODO: Implement actual async client usage
         try:
             client = await self._get_async_client()
@@ -144,18 +186,19 @@ class TemplateClient(BaseLLMClient):
         except Exception:
             return self._fallback_to_mock(ad_text, chunk, f"Async{self.provider_name} client init failed")
         
-        prompt = self._build_prompt(ad_text, chunk, ad_platform)
         try:
-            # TODO: Replace with actual async API call for your provider
-            response = None  # TODO: Implement actual async API call
-            
-            # TODO: Extract content from response based on provider's response format
-            content = None  # TODO: Extract content from response
+            # Hold the concurrency slot until the whole response has been read
+            async with self._concurrency_limit():
+                # TODO: Replace with actual async API call for your provider
+                response = None  # TODO: Implement actual async API call
+                
+                # TODO: Extract content from response based on provider's response format
+                content = None  # TODO: Extract content from response
             
         except Exception:
             return self._fallback_to_mock(ad_text, chunk, f"Async{self.provider_name} API call failed")
         
-        return self._parse_and_validate_response(content, chunk, ad_text, f"Async{self.provider_name}")
+        return self._parse_and_validate_response(content, chunk, ad_text, f"Async{self.provider_name}", cache_key)
 
 
 
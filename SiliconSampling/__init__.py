@@ -9,7 +9,7 @@ Main Components:
 - data: Identity bank configurations and demographic distributions
 """
 
-from .sampler import load_identity_bank, sample_identities
+from .sampler import Identity, PreparedBank, load_identity_bank, prepare_identity_bank, sample_identities
 
 __version__ = "1.0.0"
-__all__ = ["load_identity_bank", "sample_identities"]
\ No newline at end of file
+__all__ = ["Identity", "PreparedBank", "load_identity_bank", "prepare_identity_bank", "sample_identities"]
\ No newline at end of file
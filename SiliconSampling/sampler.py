@@ -4,224 +4,503 @@ This module reads a JSON-defined identity bank and produces sampled
 identities according to the configured distributions.
 """
 
+import bisect
+import functools
 import json
 import math
 import os
 import random
-from typing import Any, Dict, List
+import sys
+from dataclasses import dataclass, field
+from statistics import NormalDist
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
+import numpy as np
 
-def load_identity_bank(path: str) -> Dict[str, Any]:
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+@dataclass(frozen=True)
+class CategoricalTable:
+    """Precomputed sampling table for a categorical field.
+
+    Attributes:
+        values: Candidate values.
+        cum_probs: Cumulative probabilities, or ``None`` for a uniform choice.
+    """
+    values: Tuple[Any, ...]
+    cum_probs: Optional[np.ndarray] = None
+
+
+@dataclass(frozen=True)
+class BucketTable:
+    """Precomputed sampling table for a ``float_bucketed`` field.
+
+    Attributes:
+        cum_weights: Cumulative bucket weights.
+        lo: Lower bound of each bucket.
+        hi: Upper bound of each bucket.
+    """
+    cum_weights: np.ndarray
+    lo: np.ndarray
+    hi: np.ndarray
+
+
+@dataclass(frozen=True)
+class TruncatedNormal:
+    """Precomputed parameters for an integer truncated-normal field.
+
+    Attributes:
+        mean: Mean of the untruncated normal.
+        std: Standard deviation of the untruncated normal.
+        vmin: Lower truncation bound.
+        vmax: Upper truncation bound.
+        cdf_lo: Normal CDF at ``vmin``.
+        cdf_hi: Normal CDF at ``vmax``.
+    """
+    mean: float
+    std: float
+    vmin: float
+    vmax: float
+    cdf_lo: float
+    cdf_hi: float
+
+    def ppf(self, u: float) -> float:
+        """Map a uniform draw ``u`` in [0, 1) to a sample within [vmin, vmax]."""
+        if self.std <= 0 or self.cdf_hi <= self.cdf_lo:
+            return min(max(self.mean, self.vmin), self.vmax)
+        p = self.cdf_lo + u * (self.cdf_hi - self.cdf_lo)
+        p = min(max(p, 1e-12), 1.0 - 1e-12)
+        x = NormalDist(self.mean, self.std).inv_cdf(p)
+        return min(max(x, self.vmin), self.vmax)
+
+
+@dataclass(frozen=True)
+class PreparedBank:
+    """Identity bank together with the tables used by the vectorized sampler.
+
+    Attributes:
+        raw: Parsed identity bank configuration.
+        gender: Sampling table for ``gender``.
+        age: Truncated-normal parameters for ``age``.
+        regions: Formatted, interned "City, ST" strings for ``region``; samples
+            reference these instead of formatting a new string per draw.
+        occupation: Sampling table for ``occupation``.
+        annual_salary: Bucket table for ``annual_salary``.
+        liability_status: Bucket table for ``liability_status``.
+        p_married: Probability that ``is_married`` is True.
+        p_health: Probability that ``health_status`` is True.
+        illnesses: Illness names drawn when ``health_status`` is True.
+    """
+    raw: Dict[str, Any] = field(repr=False)
+    gender: CategoricalTable
+    age: TruncatedNormal
+    regions: Tuple[str, ...]
+    occupation: CategoricalTable
+    annual_salary: BucketTable
+    liability_status: BucketTable
+    p_married: float
+    p_health: float
+    illnesses: Tuple[str, ...]
+
+
+@dataclass(slots=True)
+class Identity:
+    """A sampled identity record.
+
+    Uses ``__slots__`` to keep per-record memory low for large populations.
+    ``get`` mirrors ``dict.get`` so profile consumers accept both identities
+    and plain dictionaries.
+    """
+    gender: str
+    age: int
+    region: str
+    occupation: str
+    annual_salary: float
+    liability_status: float
+    is_married: bool
+    health_status: bool
+    illness: Optional[str] = None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return attribute ``key``, or ``default`` if it is missing or None."""
+        value = getattr(self, key, None)
+        return default if value is None else value
+
+
+def _prepare_categorical(cfg: Dict[str, Any]) -> CategoricalTable:
+    """Build a :class:`CategoricalTable` from a categorical configuration."""
+    values = cfg.get("values", [])
+    probs = cfg.get("probs")
+    if not values:
+        raise ValueError("categorical values empty")
+    if probs is None:
+        return CategoricalTable(tuple(values))
+    if len(values) != len(probs):
+        raise ValueError("values and probs length mismatch")
+    return CategoricalTable(tuple(values), _cumulative(probs))
+
+
+def _prepare_buckets(cfg: Dict[str, Any]) -> BucketTable:
+    """Build a :class:`BucketTable` from a ``float_bucketed`` configuration."""
+    buckets = cfg.get("buckets", [])
+    if not buckets:
+        raise ValueError("float_bucketed requires 'buckets'")
+    lo = np.array([float(b.get("min", 0.0)) for b in buckets])
+    hi = np.array([float(b.get("max", b.get("min", 0.0))) for b in buckets])
+    return BucketTable(
+        cum_weights=_cumulative([b.get("weight", 1.0) for b in buckets]),
+        lo=np.minimum(lo, hi),
+        hi=np.maximum(lo, hi),
+    )
+
+
+def _prepare_truncated_normal(cfg: Dict[str, Any]) -> TruncatedNormal:
+    """Build :class:`TruncatedNormal` parameters from an ``int``/``normal`` configuration."""
+    mean = float(cfg.get("mean", 40))
+    std = float(cfg.get("std", 12))
+    vmin = float(cfg.get("min", 0))
+    vmax = float(cfg.get("max", 120))
+    if std > 0:
+        dist = NormalDist(mean, std)
+        cdf_lo, cdf_hi = dist.cdf(vmin), dist.cdf(vmax)
+    else:
+        cdf_lo, cdf_hi = 0.0, 0.0
+    return TruncatedNormal(mean, std, vmin, vmax, cdf_lo, cdf_hi)
+
+
+def _cumulative(weights: List[float]) -> np.ndarray:
+    """Return cumulative weights, validating that they sum to a positive total."""
+    cum = np.cumsum(np.asarray(weights, dtype=float))
+    if cum.size == 0 or cum[-1] <= 0:
+        raise ValueError("Sum of weights must be positive")
+    return cum
+
+
+def prepare_identity_bank(bank: Dict[str, Any]) -> PreparedBank:
+    """Precompute the sampling tables for a parsed identity bank.
+
+    Args:
+        bank: Parsed identity bank configuration.
+
+    Returns:
+        A :class:`PreparedBank` wrapping ``bank``.
+    """
+    regions = bank["region"].get("values", [])
+    if not regions:
+        raise ValueError("region.values empty")
+    health = bank["health_status"]
+    return PreparedBank(
+        raw=bank,
+        gender=_prepare_categorical(bank["gender"]),
+        age=_prepare_truncated_normal(bank["age"]),
+        regions=tuple(
+            sys.intern(f"{v.get('city', 'Unknown')}, {v['state']}" if v.get("state") else v.get("city", "Unknown"))
+            for v in regions
+        ),
+        occupation=_prepare_categorical(bank["occupation"]),
+        annual_salary=_prepare_buckets(bank["annual_salary"]),
+        liability_status=_prepare_buckets(bank["liability_status"]),
+        p_married=float(bank["is_married"].get("p_true", 0.5)),
+        p_health=float(health.get("p_true", 0.5)),
+        illnesses=tuple(v for v in health.get("values", []) if v.lower() != "none"),
+    )
+
+
+@functools.lru_cache(maxsize=8)
+def _load_bank_cached(path: str, mtime_ns: int) -> PreparedBank:
+    """Parse and prepare an identity bank; cached on ``(path, mtime_ns)``."""
+    if orjson is not None:
+        with open(path, "rb") as f:
+            return prepare_identity_bank(orjson.loads(f.read()))
+    with open(path, "r", encoding="utf-8") as f:
+        return prepare_identity_bank(json.load(f))
+
+
+def load_identity_bank(path: str) -> PreparedBank:
     """Load an identity bank JSON file from disk.
 
+    Results are cached per path and file modification time, so repeated loads
+    are free while edits to the file are still picked up.
+
     Args:
         path: Filesystem path to the identity bank JSON.
 
     Returns:
-        Parsed JSON as a dictionary.
+        The prepared bank; the parsed JSON is available as ``raw``.
     """
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return _load_bank_cached(path, os.stat(path).st_mtime_ns)
 
 
-def _weighted_choice(weights: List[float], rng: random.Random) -> int:
-    """Return an index sampled proportional to ``weights``.
+def _weighted_choice(cum_weights: Sequence[float], total: float, rng: random.Random) -> int:
+    """Return an index sampled proportional to the weights behind ``cum_weights``.
 
     Args:
-        weights: Non-negative weights.
+        cum_weights: Cumulative non-negative weights.
+        total: Sum of the weights (``cum_weights[-1]``).
         rng: Random number generator.
 
     Returns:
-        Selected index in ``weights``.
+        Selected index in ``cum_weights``.
     """
-    total = sum(weights)
-    if total <= 0:
-        raise ValueError("Sum of weights must be positive")
-    r = rng.random() * total
-    upto = 0.0
-    for i, w in enumerate(weights):
-        upto += w
-        if r <= upto:
-            return i
-    return len(weights) - 1
+    idx = bisect.bisect_left(cum_weights, rng.random() * total)
+    return min(idx, len(cum_weights) - 1)
 
 
-def _sample_categorical(cfg: Dict[str, Any], rng: random.Random):
-    """Sample a value from a categorical configuration.
+def _sample_categorical(table: CategoricalTable, rng: random.Random):
+    """Sample a value from a categorical table.
 
     Args:
-        cfg: Dict with keys ``values`` and optional ``probs``.
+        table: Prepared categorical table.
         rng: Random number generator.
 
     Returns:
-        One element from ``values``.
+        One element from ``table.values``.
     """
-    values = cfg.get("values", [])
-    probs = cfg.get("probs")
-    if not values:
-        raise ValueError("categorical values empty")
-    if probs is None:
-        return rng.choice(values)
-    if len(values) != len(probs):
-        raise ValueError("values and probs length mismatch")
-    idx = _weighted_choice(probs, rng)
-    return values[idx]
+    if table.cum_probs is None:
+        return rng.choice(table.values)
+    idx = _weighted_choice(table.cum_probs, float(table.cum_probs[-1]), rng)
+    return table.values[idx]
 
 
-def _sample_int_normal(cfg: Dict[str, Any], rng: random.Random) -> int:
+def _sample_int_normal(params: TruncatedNormal, rng: random.Random) -> int:
     """Sample an integer from a truncated normal distribution.
 
+    Uses the inverse CDF restricted to [min, max], so exactly one uniform
+    draw is consumed per sample.
+
     Args:
-        cfg: Dict with ``mean``, ``std``, ``min``, ``max``.
+        params: Prepared truncated-normal parameters.
         rng: Random number generator.
 
     Returns:
         Integer sample within [min, max].
     """
-    mean = cfg.get("mean", 40)
-    std = cfg.get("std", 12)
-    vmin = cfg.get("min", 0)
-    vmax = cfg.get("max", 120)
-    # Truncated normal via rejection with fallback to clipping
-    for _ in range(8):
-        x = rng.gauss(mean, std)
-        if vmin <= x <= vmax:
-            return int(round(x))
-    x = max(vmin, min(vmax, rng.gauss(mean, std)))
-    return int(round(x))
+    return int(round(params.ppf(rng.random())))
 
 
-def _sample_float_bucketed(cfg: Dict[str, Any], rng: random.Random) -> float:
+def _sample_float_bucketed(table: BucketTable, rng: random.Random) -> float:
     """Sample a float uniformly within a randomly chosen weighted bucket.
 
     Args:
-        cfg: Dict containing ``buckets`` with ``min``, ``max``, and ``weight``.
+        table: Prepared bucket table.
         rng: Random number generator.
 
     Returns:
         Float sampled from the selected bucket range.
     """
-    buckets = cfg.get("buckets", [])
-    if not buckets:
-        raise ValueError("float_bucketed requires 'buckets'")
-    weights = [b.get("weight", 1.0) for b in buckets]
-    idx = _weighted_choice(weights, rng)
-    b = buckets[idx]
-    vmin = float(b.get("min", 0.0))
-    vmax = float(b.get("max", vmin))
-    if vmax < vmin:
-        vmin, vmax = vmax, vmin
+    idx = _weighted_choice(table.cum_weights, float(table.cum_weights[-1]), rng)
+    vmin = float(table.lo[idx])
+    vmax = float(table.hi[idx])
     return rng.random() * (vmax - vmin) + vmin
 
 
-def _sample_region(cfg: Dict[str, Any], rng: random.Random) -> str:
-    """Sample a region as a "City, ST" string from composite values.
+def _sample_health(p_true: float, illnesses: Tuple[str, ...], rng: random.Random):
+    """Sample health status and an optional illness name.
+
+    If the health flag is True, return a random illness from ``illnesses``;
+    otherwise illness is ``None``.
 
     Args:
-        cfg: Dict with list of objects containing ``city`` and ``state``.
+        p_true: Probability of a health condition.
+        illnesses: Illness names to choose from.
         rng: Random number generator.
 
     Returns:
-        Region string.
+        Tuple ``(health_status: bool, illness: Optional[str])``.
     """
-    values = cfg.get("values", [])
-    if not values:
-        raise ValueError("region.values empty")
-    item = rng.choice(values)
-    city = item.get("city", "Unknown")
-    state = item.get("state", "")
-    if state:
-        return f"{city}, {state}"
-    return city
+    has_condition = rng.random() < p_true
+    illness = None
+    if has_condition and illnesses:
+        illness = rng.choice(illnesses)
+    return has_condition, illness
 
 
-def _sample_bool(cfg: Dict[str, Any], rng: random.Random) -> bool:
-    """Sample a boolean with probability ``p_true`` of being True.
+def sample_identity(bank: PreparedBank | Dict[str, Any], rng: random.Random) -> Identity:
+    """Sample a single identity record from the bank.
 
     Args:
-        cfg: Dict containing ``p_true`` (default 0.5).
+        bank: Prepared bank, or a parsed configuration to prepare on the fly.
         rng: Random number generator.
 
     Returns:
-        Boolean sample.
+        Sampled :class:`Identity`; ``illness`` is set only with a health condition.
+    """
+    if not isinstance(bank, PreparedBank):
+        bank = prepare_identity_bank(bank)
+    gender = _sample_categorical(bank.gender, rng)
+    age = _sample_int_normal(bank.age, rng)
+    region = rng.choice(bank.regions)
+    occupation = _sample_categorical(bank.occupation, rng)
+    annual_salary = _sample_float_bucketed(bank.annual_salary, rng)
+    liability_status = _sample_float_bucketed(bank.liability_status, rng)
+    is_married = rng.random() < bank.p_married
+    health_status, illness = _sample_health(bank.p_health, bank.illnesses, rng)
+
+    return Identity(
+        gender=gender,
+        age=age,
+        region=region,
+        occupation=occupation,
+        annual_salary=round(float(annual_salary), 2),
+        liability_status=round(float(liability_status), 2),
+        is_married=bool(is_married),
+        health_status=bool(health_status),
+        illness=illness if health_status and illness else None
+    )
+
+
+def _weighted_choice_n(cum_weights: np.ndarray, n: int, rng: np.random.Generator) -> np.ndarray:
+    """Vectorized counterpart of :func:`_weighted_choice` drawing ``n`` indices.
+
+    Args:
+        cum_weights: Cumulative non-negative weights.
+        n: Number of indices to draw.
+        rng: NumPy random generator.
+
+    Returns:
+        Integer array of indices into ``cum_weights``.
     """
-    p_true = float(cfg.get("p_true", 0.5))
-    return rng.random() < p_true
+    idx = np.searchsorted(cum_weights, rng.random(n) * cum_weights[-1], side="left")
+    return np.minimum(idx, cum_weights.size - 1)
 
 
-def _sample_health(cfg: Dict[str, Any], rng: random.Random):
-    """Sample health status and an optional illness name.
+def _take(values: Sequence[Any], idx: np.ndarray) -> np.ndarray:
+    """Map an index array to ``values`` in one C-level gather.
+
+    Returns an object array, so the index-to-value lookup and the final
+    ``tolist`` both run without a per-element Python loop.
+    """
+    lookup = np.empty(len(values), dtype=object)
+    lookup[:] = values
+    return lookup[idx]
+
 
-    If the boolean health flag is True, return a random illness from ``values``
-    excluding the literal "None" entry; otherwise illness is ``None``.
+def _sample_categorical_n(table: CategoricalTable, n: int, rng: np.random.Generator) -> List[Any]:
+    """Sample ``n`` values from a categorical table.
 
     Args:
-        cfg: Dict with ``p_true`` and ``values``.
-        rng: Random number generator.
+        table: Prepared categorical table.
+        n: Number of samples.
+        rng: NumPy random generator.
 
     Returns:
-        Tuple ``(health_status: bool, illness: Optional[str])``.
+        List of ``n`` elements from ``table.values``.
     """
-    has_condition = _sample_bool(cfg, rng)
-    illness = None
-    if has_condition:
-        values = [v for v in cfg.get("values", []) if v.lower() != "none"]
-        if values:
-            illness = rng.choice(values)
-    return has_condition, illness
+    if table.cum_probs is None:
+        idx = rng.integers(0, len(table.values), n)
+    else:
+        idx = _weighted_choice_n(table.cum_probs, n, rng)
+    return _take(table.values, idx).tolist()
 
 
-def sample_identity(bank: Dict[str, Any], rng: random.Random) -> Dict[str, Any]:
-    """Sample a single identity record from the bank.
+def _sample_int_normal_n(params: TruncatedNormal, n: int, rng: np.random.Generator) -> List[int]:
+    """Sample ``n`` integers from a truncated normal distribution.
+
+    One oversampled normal draw is masked to [min, max]; any shortfall is
+    filled by inverse-CDF sampling, so the result is always exactly
+    truncated rather than clipped.
 
     Args:
-        bank: Parsed identity bank configuration.
-        rng: Random number generator.
+        params: Prepared truncated-normal parameters.
+        n: Number of samples.
+        rng: NumPy random generator.
+
+    Returns:
+        List of integer samples within [min, max].
+    """
+    if params.std <= 0:
+        return [int(round(params.ppf(0.0)))] * n
+    draws = rng.normal(params.mean, params.std, size=n * 2)
+    valid = draws[(draws >= params.vmin) & (draws <= params.vmax)][:n]
+    if valid.size < n:
+        tail = np.array([params.ppf(u) for u in rng.random(n - valid.size).tolist()])
+        valid = np.concatenate([valid, tail])
+    return np.rint(valid).astype(int).tolist()
+
+
+def _sample_float_bucketed_n(table: BucketTable, n: int, rng: np.random.Generator) -> List[float]:
+    """Sample ``n`` floats, each uniform within a weighted bucket.
+
+    Values are rounded to two decimals, matching :func:`sample_identity`.
+
+    Args:
+        table: Prepared bucket table.
+        n: Number of samples.
+        rng: NumPy random generator.
 
     Returns:
-        Dictionary with sampled fields and optional ``illness``.
-    """
-    gender = _sample_categorical(bank["gender"], rng)
-    age = _sample_int_normal(bank["age"], rng)
-    region = _sample_region(bank["region"], rng)
-    occupation = _sample_categorical(bank["occupation"], rng)
-    annual_salary = _sample_float_bucketed(bank["annual_salary"], rng)
-    liability_status = _sample_float_bucketed(bank["liability_status"], rng)
-    is_married = _sample_bool(bank["is_married"], rng)
-    health_status, illness = _sample_health(bank["health_status"], rng)
-
-    ident = {
-        "gender": gender,
-        "age": age,
-        "region": region,
-        "occupation": occupation,
-        "annual_salary": round(float(annual_salary), 2),
-        "liability_status": round(float(liability_status), 2),
-        "is_married": bool(is_married),
-        "health_status": bool(health_status)
-    }
-    if health_status and illness:
-        ident["illness"] = illness
-    return ident
-
-
-def sample_identities(n: int, bank: Dict[str, Any], seed: int | None = None) -> List[Dict[str, Any]]:
+        List of float samples.
+    """
+    idx = _weighted_choice_n(table.cum_weights, n, rng)
+    lo = table.lo[idx]
+    x = lo + rng.random(n) * (table.hi[idx] - lo)
+    return np.round(x, 2).tolist()
+
+
+def _sample_health_n(p_true: float, illnesses: Tuple[str, ...], n: int, rng: np.random.Generator):
+    """Sample ``n`` health statuses and optional illness names.
+
+    Args:
+        p_true: Probability of a health condition.
+        illnesses: Illness names to choose from.
+        n: Number of samples.
+        rng: NumPy random generator.
+
+    Returns:
+        Tuple ``(health_status: List[bool], illness: List[Optional[str]])``.
+    """
+    has_condition = rng.random(n) < p_true
+    if not illnesses:
+        return has_condition.tolist(), [None] * n
+    illness = _take(illnesses, rng.integers(0, len(illnesses), n))
+    illness[~has_condition] = None
+    return has_condition.tolist(), illness.tolist()
+
+
+def sample_identities(n: int, bank: PreparedBank | Dict[str, Any], seed: int | None = None) -> List[Identity]:
     """Sample ``n`` identities using the provided bank.
 
+    Each field is drawn for the whole population at once with NumPy and the
+    columns are zipped into records at the end, which avoids the per-record
+    Python overhead of :func:`sample_identity`.
+
     Args:
         n: Number of records to generate.
-        bank: Parsed identity bank configuration.
+        bank: Prepared bank, or a parsed configuration to prepare on the fly.
         seed: Optional seed for reproducibility.
 
     Returns:
-        List of identity dictionaries.
+        List of :class:`Identity` records.
     """
-    rng = random.Random(seed)
-    return [sample_identity(bank, rng) for _ in range(n)]
+    if n <= 0:
+        return []
+    if not isinstance(bank, PreparedBank):
+        bank = prepare_identity_bank(bank)
+    rng = np.random.default_rng(seed)
+    genders = _sample_categorical_n(bank.gender, n, rng)
+    ages = _sample_int_normal_n(bank.age, n, rng)
+    regions = _take(bank.regions, rng.integers(0, len(bank.regions), n)).tolist()
+    occupations = _sample_categorical_n(bank.occupation, n, rng)
+    salaries = _sample_float_bucketed_n(bank.annual_salary, n, rng)
+    liabilities = _sample_float_bucketed_n(bank.liability_status, n, rng)
+    married = (rng.random(n) < bank.p_married).tolist()
+    health, illnesses = _sample_health_n(bank.p_health, bank.illnesses, n, rng)
+
+    return [
+        Identity(*row)
+        for row in zip(genders, ages, regions, occupations, salaries, liabilities, married, health, illnesses)
+    ]
 
 
 __all__ = [
+    "Identity",
+    "PreparedBank",
     "load_identity_bank",
+    "prepare_identity_bank",
     "sample_identities",
     "sample_identity",
 ]
@@ -4,16 +4,22 @@ This module provides a REST API interface for the Wisteria CTR Studio,
 allowing users to predict click-through rates via HTTP requests.
 """
 
+import asyncio
 import os
 import time
-import json
 import io
-from typing import Dict, List, Optional, Any
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import JSONResponse, FileResponse
+from fastapi.routing import APIRoute
 from pydantic import BaseModel, Field
+import numpy as np
+import orjson
 import uvicorn
 
 # Google Cloud Storage for identity bank loading
@@ -23,8 +29,8 @@ try:
 except ImportError:
     GCS_AVAILABLE = False
 
-from SiliconSampling.sampler import load_identity_bank, sample_identities
-from CTRPrediction.llm_click_model import LLMClickPredictor
+from SiliconSampling.sampler import Identity, load_identity_bank, prepare_identity_bank, sample_identities
+from CTRPrediction.llm_click_model import LLMClickPredictor, aclose_shared_clients
 
 
 # Pydantic models for request/response validation
@@ -121,27 +127,118 @@ class ErrorResponse(BaseModel):
     timestamp: str
 
 
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson.
+
+    orjson encodes large payloads (e.g. detailed results) several times faster
+    than the stdlib encoder. Defined here rather than imported because
+    ``fastapi.responses.ORJSONResponse`` is deprecated in recent releases.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
+def _inflate_gzip(body: bytes, max_size: int) -> bytes:
+    """Decompress a gzip request body, refusing to inflate past ``max_size`` bytes."""
+    inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    try:
+        data = inflater.decompress(body, max_size + 1)
+    except zlib.error:
+        raise HTTPException(status_code=400, detail="Malformed gzip request body")
+    if len(data) > max_size:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Decompressed request body exceeds {max_size} bytes"
+        )
+    if not inflater.eof:
+        raise HTTPException(status_code=400, detail="Truncated gzip request body")
+    return data
+
+
+class GzipRequest(Request):
+    """Request whose body is transparently decompressed when sent gzip-encoded."""
+
+    async def body(self) -> bytes:
+        if not hasattr(self, "_body"):
+            body = await super().body()
+            encodings = [
+                token.strip().lower()
+                for value in self.headers.getlist("Content-Encoding")
+                for token in value.split(",")
+                if token.strip() and token.strip().lower() != "identity"
+            ]
+            if encodings in (["gzip"], ["x-gzip"]):
+                body = _inflate_gzip(body, MAX_REQUEST_BODY_BYTES)
+            elif encodings:
+                raise HTTPException(
+                    status_code=415,
+                    detail=f"Unsupported Content-Encoding: {', '.join(encodings)}"
+                )
+            self._body = body
+        return self._body
+
+
+class GzipRoute(APIRoute):
+    """Route that accepts gzip-compressed request bodies."""
+
+    def get_route_handler(self):
+        original_route_handler = super().get_route_handler()
+
+        async def custom_route_handler(request: Request):
+            return await original_route_handler(GzipRequest(request.scope, request.receive))
+
+        return custom_route_handler
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Wisteria CTR Studio API",
+    default_response_class=ORJSONResponse,
     description="REST API for click-through rate prediction using synthetic identities and LLM models",
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc"
 )
+# Accept gzip request bodies and compress large responses (e.g. detailed results)
+app.router.route_class = GzipRoute
+app.add_middleware(GZipMiddleware, minimum_size=1024)
 
 # Global configuration
 DEFAULT_IDENTITY_BANK_PATH = os.path.join("SiliconSampling", "data", "identity_bank.json")
 AVAILABLE_PROVIDERS = ["openai", "deepseek"]
 AVAILABLE_PLATFORMS = ["facebook", "tiktok", "amazon"]
 
+# Models accepted per provider; override with a comma-separated <PROVIDER>_MODELS
+DEFAULT_PROVIDER_MODELS = {
+    "openai": ["gpt-4o-mini", "gpt-4o", "gpt-4.1", "gpt-4.1-mini", "gpt-4.1-nano", "gpt-5", "gpt-5-mini", "gpt-5-nano"],
+    "deepseek": ["deepseek-chat", "deepseek-reasoner"],
+}
+AVAILABLE_MODELS = {
+    provider: [m.strip() for m in os.getenv(f"{provider.upper()}_MODELS", ",".join(models)).split(",") if m.strip()]
+    for provider, models in DEFAULT_PROVIDER_MODELS.items()
+}
+
 # Google Cloud Storage configuration
 GCS_BUCKET_NAME = os.getenv("GCS_BUCKET_NAME", "wisteria-data-bucket")
 GCS_IDENTITY_BANK_PATH = os.getenv("GCS_IDENTITY_BANK_PATH", "data/identity_bank.json")
 
+# Largest request body accepted after gzip decompression
+MAX_REQUEST_BODY_BYTES = int(os.getenv("MAX_REQUEST_BODY_BYTES", str(1024 * 1024)))
+
+# Number of sampled populations kept for repeated mock requests, and the
+# total identities they may hold; larger populations are never cached
+MOCK_POPULATION_CACHE_SIZE = int(os.getenv("MOCK_POPULATION_CACHE_SIZE", "8"))
+MOCK_POPULATION_CACHE_MAX_IDENTITIES = int(os.getenv("MOCK_POPULATION_CACHE_MAX_IDENTITIES", "100000"))
+
+# Maximum number of requests from one batch predicted concurrently
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "5"))
+
 # Application state for caching identity bank
 app.state.identity_bank = None
 app.state.gcs_client = None
+app.state.mock_populations = OrderedDict()
 
 
 def load_identity_bank_from_gcs():
@@ -165,8 +262,8 @@ def load_identity_bank_from_gcs():
                 detail=f"Identity bank file not found in GCS: gs://{GCS_BUCKET_NAME}/{GCS_IDENTITY_BANK_PATH}"
             )
         
-        content = blob.download_as_text()
-        return json.loads(content)
+        content = blob.download_as_bytes()
+        return prepare_identity_bank(orjson.loads(content))
         
     except Exception as e:
         raise HTTPException(
@@ -215,8 +312,8 @@ def get_identity_bank(identity_bank_path: Optional[str] = None):
                         detail=f"Identity bank file not found in GCS: {identity_bank_path}"
                     )
                 
-                content = blob.download_as_text()
-                return json.loads(content)
+                content = blob.download_as_bytes()
+                return prepare_identity_bank(orjson.loads(content))
                 
             except Exception as e:
                 if isinstance(e, HTTPException):
@@ -296,13 +393,42 @@ async def shutdown_event():
     """Cleanup on application shutdown."""
     app.state.identity_bank = None
     app.state.gcs_client = None
+    app.state.mock_populations.clear()
+    await aclose_shared_clients()
 
 
-def compute_ctr(clicks: List[int]) -> float:
-    """Compute click-through rate from binary predictions."""
-    if not clicks:
-        return 0.0
-    return sum(1 for x in clicks if x) / float(len(clicks))
+def summarize_clicks(clicks: np.ndarray) -> Tuple[int, float]:
+    """Return ``(total_clicks, ctr)`` from binary predictions in one reduction."""
+    arr = np.asarray(clicks, dtype=np.int8)
+    if arr.size == 0:
+        return 0, 0.0
+    total_clicks = int(np.count_nonzero(arr))
+    return total_clicks, total_clicks / arr.size
+
+
+def get_mock_population(n: int, bank, seed: Optional[int]) -> List[Identity]:
+    """Return the sampled population for a mock request, reusing recent samples.
+
+    The mock model scores profile contents, so identities are still needed,
+    but sampling is deterministic for a seeded request. Repeated mock calls
+    (health probes, load tests, demos) are served from a small LRU keyed on
+    the bank, population size and seed. The LRU is bounded by entry count and
+    by total cached identities, so large populations are sampled per request.
+    """
+    if seed is None or MOCK_POPULATION_CACHE_SIZE <= 0 or n > MOCK_POPULATION_CACHE_MAX_IDENTITIES:
+        return sample_identities(n, bank, seed=seed)
+    cache = app.state.mock_populations
+    key = (id(bank), n, seed)
+    entry = cache.get(key)
+    if entry is not None and entry[0] is bank:
+        cache.move_to_end(key)
+        return entry[1]
+    identities = sample_identities(n, bank, seed=seed)
+    cache[key] = (bank, identities)
+    cached = sum(len(entry[1]) for entry in cache.values())
+    while len(cache) > MOCK_POPULATION_CACHE_SIZE or cached > MOCK_POPULATION_CACHE_MAX_IDENTITIES:
+        cached -= len(cache.popitem(last=False)[1][1])
+    return identities
 
 
 def validate_request(request: CTRRequest) -> None:
@@ -320,6 +446,38 @@ def validate_request(request: CTRRequest) -> None:
         )
 
 
+def get_effective_batch_size(request: CTRRequest) -> int:
+    """Return the batch size to use, merging very small batches for large populations.
+
+    Each LLM call carries fixed request overhead, so small batch sizes are
+    raised to ``population_size // 20`` (capped at 100).
+    """
+    effective = max(request.batch_size, min(100, request.population_size // 20))
+    if effective != request.batch_size:
+        print(f"ℹ️  batch_size {request.batch_size} raised to {effective} for population_size {request.population_size}")
+    return effective
+
+
+def resolve_model(request: CTRRequest) -> str:
+    """Return the model to use for a request, rejecting unknown models.
+
+    Models come from a fixed per-provider list so request input cannot grow
+    the shared-client registry. When the request leaves ``model`` unset and
+    the schema default does not belong to the provider, the provider default
+    is used instead.
+    """
+    model = request.model or get_default_model(request.provider)
+    allowed = AVAILABLE_MODELS.get(request.provider, [])
+    if "model" not in request.model_fields_set and model not in allowed:
+        model = get_default_model(request.provider)
+    if model not in allowed:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid model for {request.provider}. Must be one of: {allowed}"
+        )
+    return model
+
+
 def get_default_model(provider: str) -> str:
     """Get default model for a provider."""
     defaults = {
@@ -329,22 +487,7 @@ def get_default_model(provider: str) -> str:
     return defaults.get(provider, "gpt-4o-mini")
 
 
-def format_identity_profile(profile: Dict[str, Any]) -> IdentityProfile:
-    """Convert identity dictionary to IdentityProfile model."""
-    return IdentityProfile(
-        gender=profile.get("gender", ""),
-        age=profile.get("age", 0),
-        region=profile.get("region", ""),
-        occupation=profile.get("occupation", ""),
-        annual_salary=profile.get("annual_salary", 0.0),
-        liability_status=profile.get("liability_status", 0.0),
-        is_married=profile.get("is_married", False),
-        health_status=profile.get("health_status", False),
-        illness=profile.get("illness")
-    )
-
-
-@app.get("/health", response_model=HealthResponse)
+@app.api_route("/health", methods=["GET", "HEAD"], response_model=HealthResponse)
 async def health_check():
     """Health check endpoint."""
     return HealthResponse(
@@ -355,40 +498,39 @@ async def health_check():
     )
 
 
-@app.post("/predict-ctr", response_model=CTRResponse)
-async def predict_ctr(request: CTRRequest, include_details: bool = False):
-    """
-    Predict click-through rate for an advertisement.
-    
+async def run_ctr_prediction(request: CTRRequest, include_details: bool = False) -> Dict[str, Any]:
+    """Run a CTR prediction and return the response payload as a plain dict.
+
+    The payload has the shape of ``CTRResponse``. Detailed results are emitted
+    as dicts built from the sampled identities rather than Pydantic models,
+    since the data is produced by the server itself and needs no validation.
+
     Args:
         request: CTR prediction request parameters
         include_details: Whether to include detailed per-identity results
-        
+
     Returns:
         CTR prediction results with summary statistics
     """
     try:
         # Validate request
         validate_request(request)
+        model = resolve_model(request)
         
         # Load identity bank (from cache, local file, or GCS)
         bank = get_identity_bank(request.identity_bank_path)
         
         # Generate synthetic identities
-        identities = sample_identities(
-            request.population_size, 
-            bank, 
-            seed=request.seed
-        )
-        
-        # Get model name
-        model = request.model or get_default_model(request.provider)
+        if request.use_mock:
+            identities = get_mock_population(request.population_size, bank, request.seed)
+        else:
+            identities = sample_identities(request.population_size, bank, seed=request.seed)
         
         # Initialize predictor
         predictor = LLMClickPredictor(
             provider=request.provider,
             model=model,
-            batch_size=request.batch_size,
+            batch_size=get_effective_batch_size(request),
             use_mock=request.use_mock,
             use_async=not request.use_sync,
             api_key=request.api_key,
@@ -396,54 +538,55 @@ async def predict_ctr(request: CTRRequest, include_details: bool = False):
         
         # Predict clicks
         start_time = time.time()
-        if not request.use_sync and not request.use_mock:
-            # Use async processing - await the async method directly
-            clicks = await predictor.predict_clicks_async(
-                request.ad_text, 
-                identities, 
-                request.ad_platform
-            )
-        else:
-            # Use sync processing or mock
-            clicks = predictor.predict_clicks(
-                request.ad_text, 
-                identities, 
-                request.ad_platform
-            )
+        try:
+            if not request.use_sync and not request.use_mock:
+                # Use async processing - await the async method directly
+                clicks = await predictor.predict_clicks_async(
+                    request.ad_text, 
+                    identities, 
+                    request.ad_platform
+                )
+            else:
+                # Use sync processing or mock
+                clicks = predictor.predict_clicks(
+                    request.ad_text, 
+                    identities, 
+                    request.ad_platform
+                )
+        finally:
+            # Release the private client of a per-request api_key override
+            await predictor.aclose()
         end_time = time.time()
         runtime = end_time - start_time
         
         # Compute CTR
-        ctr = compute_ctr(clicks)
+        total_clicks, ctr = summarize_clicks(clicks)
         
         # Prepare response
         provider_used = request.provider if not request.use_mock else "mock"
         model_used = model if not request.use_mock else "mock model (no LLM)"
         processing_mode = "synchronous sequential" if request.use_sync else "asynchronous parallel"
         
-        response = CTRResponse(
-            success=True,
-            ctr=round(ctr, 4),
-            total_clicks=sum(clicks),
-            total_identities=len(identities),
-            runtime_seconds=round(runtime, 2),
-            provider_used=provider_used,
-            model_used=model_used,
-            processing_mode=processing_mode,
-            ad_platform=request.ad_platform,
-            timestamp=datetime.utcnow().isoformat() + "Z"
-        )
+        response = {
+            "success": True,
+            "ctr": round(ctr, 4),
+            "total_clicks": total_clicks,
+            "total_identities": len(identities),
+            "runtime_seconds": round(runtime, 2),
+            "provider_used": provider_used,
+            "model_used": model_used,
+            "processing_mode": processing_mode,
+            "ad_platform": request.ad_platform,
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "detailed_results": None
+        }
         
         # Add detailed results if requested
         if include_details:
-            detailed_results = []
-            for i, (profile, click) in enumerate(zip(identities, clicks)):
-                detailed_results.append(DetailedResult(
-                    id=i,
-                    profile=format_identity_profile(profile),
-                    click_prediction=click
-                ))
-            response.detailed_results = detailed_results
+            response["detailed_results"] = [
+                {"id": i, "profile": profile, "click_prediction": click}
+                for i, (profile, click) in enumerate(zip(identities, clicks.tolist()))
+            ]
         
         return response
         
@@ -456,6 +599,21 @@ async def predict_ctr(request: CTRRequest, include_details: bool = False):
         )
 
 
+@app.post("/predict-ctr", response_model=CTRResponse)
+async def predict_ctr(request: CTRRequest, include_details: bool = False):
+    """
+    Predict click-through rate for an advertisement.
+    
+    Args:
+        request: CTR prediction request parameters
+        include_details: Whether to include detailed per-identity results
+        
+    Returns:
+        CTR prediction results with summary statistics
+    """
+    return ORJSONResponse(await run_ctr_prediction(request, include_details))
+
+
 @app.post("/predict-ctr-batch")
 async def predict_ctr_batch(requests: List[CTRRequest]):
     """
@@ -473,17 +631,24 @@ async def predict_ctr_batch(requests: List[CTRRequest]):
             detail="Batch size cannot exceed 10 requests"
         )
     
+    sem = asyncio.Semaphore(max(1, BATCH_MAX_CONCURRENCY))
+
+    async def _bounded(req: CTRRequest) -> dict:
+        async with sem:
+            return await run_ctr_prediction(req, include_details=False)
+
+    outcomes = await asyncio.gather(*(_bounded(req) for req in requests), return_exceptions=True)
+    
     results = []
-    for req in requests:
-        try:
-            result = await predict_ctr(req, include_details=False)
-            results.append(result)
-        except Exception as e:
+    for outcome in outcomes:
+        if isinstance(outcome, Exception):
             results.append(ErrorResponse(
                 success=False,
-                error=str(e),
+                error=str(outcome),
                 timestamp=datetime.utcnow().isoformat() + "Z"
             ))
+        else:
+            results.append(outcome)
     
     return results
 
@@ -494,11 +659,13 @@ async def list_providers():
     provider_info = {
         "openai": {
             "default_model": "gpt-4o-mini",
+            "models": AVAILABLE_MODELS["openai"],
             "description": "OpenAI GPT models",
             "env_var": "OPENAI_API_KEY"
         },
         "deepseek": {
             "default_model": "deepseek-chat", 
+            "models": AVAILABLE_MODELS["deepseek"],
             "description": "DeepSeek models",
             "env_var": "DEEPSEEK_API_KEY"
         }
@@ -521,7 +688,7 @@ async def get_identities():
         bank = get_identity_bank()
         return {
             "success": True,
-            "identity_bank": bank,
+            "identity_bank": bank.raw,
             "source": "gcs" if app.state.identity_bank and GCS_AVAILABLE else "local",
             "timestamp": datetime.utcnow().isoformat() + "Z"
         }
@@ -604,7 +771,7 @@ async def root():
 # Error handlers
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content=ErrorResponse(
             success=False,
@@ -616,7 +783,7 @@ async def http_exception_handler(request, exc):
 
 @app.exception_handler(Exception)
 async def general_exception_handler(request, exc):
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content=ErrorResponse(
             success=False,
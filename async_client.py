@@ -0,0 +1,189 @@
+"""Async client for the Wisteria CTR Studio API.
+
+An aiohttp-based counterpart to ``CTRApiClient`` in ``example_client.py``
+for callers that fan out many predictions at once. All requests share one
+connection pool and overlap their network waits on a single thread.
+
+Requires the optional ``aiohttp`` package.
+"""
+
+import asyncio
+import json
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+
+# orjson is optional; fall back to the standard library encoder/decoder
+try:
+    import orjson
+
+    def _dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
+    _loads = json.loads
+
+
+class AsyncCTRApiClient:
+    """Async client for the Wisteria CTR Studio API.
+
+    Use as an async context manager::
+
+        async with AsyncCTRApiClient() as client:
+            results = await client.predict_ctr_many([...])
+    """
+
+    def __init__(self, base_url: str = "http://localhost:8000"):
+        """Initialize the API client.
+
+        Args:
+            base_url: Base URL of the API service.
+        """
+        self.base_url = base_url.rstrip('/')
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def __aenter__(self) -> "AsyncCTRApiClient":
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=64,
+                limit_per_host=32,
+                ttl_dns_cache=300,
+                keepalive_timeout=30,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=60, connect=5),
+                headers={"Accept": "application/json", "Content-Type": "application/json"},
+                raise_for_status=True,
+            )
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Close the underlying HTTP session and its pooled connections."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _get(self, path: str) -> Any:
+        async with self._session.get(f"{self.base_url}{path}") as response:
+            return _loads(await response.read())
+
+    async def _post(self, path: str, payload: Any = None, params: Optional[Dict[str, Any]] = None) -> Any:
+        data = _dumps(payload) if payload is not None else None
+        async with self._session.post(f"{self.base_url}{path}", data=data, params=params) as response:
+            return _loads(await response.read())
+
+    async def health_check(self) -> Dict[str, Any]:
+        """Check API health status."""
+        return await self._get("/health")
+
+    async def list_providers(self) -> Dict[str, Any]:
+        """Get available providers and platforms."""
+        return await self._get("/providers")
+
+    async def get_identities(self) -> Dict[str, Any]:
+        """Get the identity bank configuration."""
+        return await self._get("/identities")
+
+    async def reload_identities(self) -> Dict[str, Any]:
+        """Reload the identity bank from the data source."""
+        return await self._post("/identities/reload")
+
+    async def predict_ctr(
+        self,
+        ad_text: str,
+        ad_platform: str = "facebook",
+        population_size: int = 1000,
+        provider: str = "openai",
+        model: str = None,
+        use_mock: bool = False,
+        include_details: bool = False,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """Predict CTR for an advertisement.
+
+        Args:
+            ad_text: Advertisement text to evaluate.
+            ad_platform: Platform where ad is shown.
+            population_size: Number of identities to sample.
+            provider: LLM provider to use.
+            model: Model name (optional).
+            use_mock: Whether to use mock predictions.
+            include_details: Whether to include detailed per-identity results.
+            **kwargs: Additional parameters.
+
+        Returns:
+            CTR prediction results.
+        """
+        payload = {
+            "ad_text": ad_text,
+            "ad_platform": ad_platform,
+            "population_size": population_size,
+            "provider": provider,
+            "use_mock": use_mock,
+            **kwargs
+        }
+
+        if model:
+            payload["model"] = model
+
+        # aiohttp only accepts str/int/float query values
+        params = {"include_details": "true"} if include_details else None
+
+        return await self._post("/predict-ctr", payload, params)
+
+    async def predict_ctr_many(self, payloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Run several independent CTR predictions concurrently.
+
+        Args:
+            payloads: List of keyword-argument dicts for :meth:`predict_ctr`.
+
+        Returns:
+            CTR prediction results in the same order as ``payloads``.
+        """
+        return await asyncio.gather(*[self.predict_ctr(**p) for p in payloads])
+
+    async def predict_ctr_batch(self, requests_list: list) -> list:
+        """Predict CTR for multiple advertisements.
+
+        Args:
+            requests_list: List of request dictionaries.
+
+        Returns:
+            List of CTR prediction results.
+        """
+        return await self._post("/predict-ctr-batch", requests_list)
+
+
+async def main():
+    """Example usage of the async CTR API client."""
+    ads = [
+        ("Special 0% APR credit card offer for travel rewards", "facebook"),
+        ("Latest smartphone with AI camera features", "tiktok"),
+        ("Eco-friendly cleaning products", "amazon"),
+    ]
+
+    async with AsyncCTRApiClient() as client:
+        try:
+            results = await client.predict_ctr_many([
+                {"ad_text": text, "ad_platform": platform, "population_size": 100, "use_mock": True}
+                for text, platform in ads
+            ])
+            for (text, platform), result in zip(ads, results):
+                print(f"{platform:>8}: CTR = {result['ctr']} | {text}")
+        except aiohttp.ClientConnectionError:
+            print("Error: Could not connect to API server.")
+            print("Make sure the server is running: python api.py")
+        except aiohttp.ClientResponseError as e:
+            print(f"HTTP Error: {e.status} {e.message}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -6,22 +6,24 @@ import os
 import time
 from typing import Any, Dict, List
 
+import numpy as np
+
 from SiliconSampling.sampler import load_identity_bank, sample_identities
 from CTRPrediction.llm_click_model import LLMClickPredictor
 
 
-def compute_ctr(clicks: List[int]) -> float:
-    if not clicks:
+def compute_ctr(clicks: np.ndarray) -> float:
+    if clicks.size == 0:
         return 0.0
-    return sum(1 for x in clicks if x) / float(len(clicks))
+    return float(clicks.mean())
 
 
-def save_results_to_csv(identities: List[Dict[str, Any]], clicks: List[int], output_path: str) -> None:
+def save_results_to_csv(identities: List[Dict[str, Any]], clicks: np.ndarray, output_path: str) -> None:
     """Save prediction results to a CSV file.
     
     Args:
         identities: List of identity profiles.
-        clicks: List of corresponding click predictions (0/1).
+        clicks: Array of corresponding click predictions (0/1).
         output_path: Path to save the CSV file.
     """
     fieldnames = [
@@ -40,7 +42,7 @@ def save_results_to_csv(identities: List[Dict[str, Any]], clicks: List[int], out
     with open(output_path, "w", newline="", encoding="utf-8") as f:
         writer = csv.DictWriter(f, fieldnames=fieldnames)
         writer.writeheader()
-        for i, (p, c) in enumerate(zip(identities, clicks)):
+        for i, (p, c) in enumerate(zip(identities, clicks.tolist())):
             row = {
                 "id": i,
                 "gender": p.get("gender"),
@@ -111,7 +113,8 @@ def main(args=None):
     print(f"Batch size: {args.batch_size}")
     print(f"Model Provider: {model_provider} | Model: {model}")
     print(f"Processing mode: {'synchronous' if args.use_sync else 'asynchronous parallel'}")
-    print(f"Clicks: {sum(clicks)} | Non-clicks: {len(clicks) - sum(clicks)}")
+    total_clicks = int(clicks.sum())
+    print(f"Clicks: {total_clicks} | Non-clicks: {len(clicks) - total_clicks}")
     print(f"CTR: {ctr:.4f}")
     print(f"Runtime: {runtime:.2f} seconds")
 
@@ -5,44 +5,277 @@ to predict click-through rates for advertisements.
 """
 
 import requests
+import copy
+import gzip
+import hashlib
 import json
-from typing import Dict, Any
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, List, Literal, Optional, Tuple
+
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+from urllib3.util.retry import Retry
+
+# orjson is optional; fall back to the standard library encoder/decoder
+try:
+    import orjson
+
+    def _dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
+    _loads = json.loads
+
+# Request bodies larger than this are gzip-compressed before sending
+COMPRESS_MIN_BYTES = 4096
+
+# Query string for detailed results, built once rather than per call
+INCLUDE_DETAILS_PARAMS = (("include_details", "true"),)
+
+# Largest batch the /predict-ctr-batch endpoint accepts
+MAX_BATCH_SIZE = 10
+
+# Client-side prediction cache (used when enable_cache=True)
+PREDICT_CACHE_TTL = 600
+PREDICT_CACHE_SIZE = 256
+
+# Transient failures retried with exponential backoff before an error is raised
+RETRY_STATUSES = [429, 502, 503, 504]
+MAX_RETRIES = 4
+
+# ijson is optional; without it detailed responses are parsed in full
+try:
+    import ijson
+    from ijson.common import ObjectBuilder
+except ImportError:
+    ijson = None
+
+# httpx is optional; needed only for transport="httpx"
+try:
+    import httpx
+except ImportError:
+    httpx = None
 
 
 class CTRApiClient:
     """Simple client for the Wisteria CTR Studio API."""
     
-    def __init__(self, base_url: str = "http://localhost:8000"):
+    def __init__(
+        self,
+        base_url: str = "http://localhost:8000",
+        compress_requests: bool = True,
+        transport: Literal["requests", "httpx"] = "requests",
+        enable_cache: bool = False,
+    ):
         """Initialize the API client.
         
         Args:
             base_url: Base URL of the API service.
+            compress_requests: Gzip request bodies above ``COMPRESS_MIN_BYTES``.
+                The server must accept ``Content-Encoding: gzip`` (``api.py`` does).
+            transport: HTTP library to use. ``"httpx"`` multiplexes concurrent
+                requests over one HTTP/2 connection when the server speaks h2
+                (e.g. Hypercorn or an h2-terminating proxy; uvicorn is
+                HTTP/1.1 only) and falls back to HTTP/1.1 otherwise.
+            enable_cache: Reuse ``predict_ctr`` results for identical requests
+                made within ``PREDICT_CACHE_TTL`` seconds instead of calling
+                the API again.
         """
+        if transport not in ("requests", "httpx"):
+            raise ValueError(f"Unknown transport '{transport}'. Use 'requests' or 'httpx'.")
+        if transport == "httpx" and httpx is None:
+            raise ImportError("transport='httpx' requires the httpx package: pip install 'httpx[http2]'")
+        
         self.base_url = base_url.rstrip('/')
+        self.compress_requests = compress_requests
+        self.transport = transport
+        
+        # One pooled session keeps connections alive across calls
+        if transport == "httpx":
+            # httpx only retries failed connection attempts, not error statuses
+            self._session = httpx.Client(
+                transport=httpx.HTTPTransport(
+                    http2=True,
+                    retries=MAX_RETRIES,
+                    limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+                ),
+                timeout=httpx.Timeout(60.0, connect=5.0),
+            )
+        else:
+            self._session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=4,
+                pool_maxsize=32,
+                # POSTs are retried too; each carries an Idempotency-Key so the
+                # server can recognise a repeated request
+                max_retries=Retry(
+                    total=MAX_RETRIES,
+                    backoff_factor=0.25,
+                    status_forcelist=RETRY_STATUSES,
+                    allowed_methods=frozenset(["GET", "POST"]),
+                    respect_retry_after_header=True,
+                    raise_on_status=False,
+                ),
+            )
+            self._session.mount("http://", adapter)
+            self._session.mount("https://", adapter)
+            # Every encoding urllib3 can decode here (gzip, deflate, plus br/zstd if installed)
+            self._session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+        self._session.headers.update({
+            "Accept": "application/json",
+            "Content-Type": "application/json",
+        })
+        
+        # path -> (fetched_at, parsed JSON) for rarely changing GET endpoints
+        self._cache: Dict[str, Tuple[float, Any]] = {}
+        
+        # request digest -> (fetched_at, response) for predict_ctr, most recent last
+        self.enable_cache = enable_cache
+        self._predict_cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._predict_cache_lock = threading.Lock()
     
-    def health_check(self) -> Dict[str, Any]:
-        """Check API health status."""
-        response = requests.get(f"{self.base_url}/health")
-        response.raise_for_status()
-        return response.json()
+    def close(self) -> None:
+        """Close the underlying HTTP session and its pooled connections."""
+        self._session.close()
     
-    def list_providers(self) -> Dict[str, Any]:
-        """Get available providers and platforms."""
-        response = requests.get(f"{self.base_url}/providers")
-        response.raise_for_status()
-        return response.json()
+    def __enter__(self) -> "CTRApiClient":
+        return self
     
-    def get_identities(self) -> Dict[str, Any]:
-        """Get the identity bank configuration."""
-        response = requests.get(f"{self.base_url}/identities")
-        response.raise_for_status()
-        return response.json()
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+    
+    def _post(self, path: str, payload: Any = None, idempotency_key: Optional[str] = None, **kwargs) -> Any:
+        """POST ``payload`` as JSON, gzip-compressing large bodies.
+        
+        The request carries an ``Idempotency-Key`` header (a fresh UUID unless
+        given) that stays the same across transport-level retries.
+        
+        Returns the ``requests`` or ``httpx`` response, depending on the transport.
+        """
+        headers = {"Idempotency-Key": idempotency_key or uuid.uuid4().hex}
+        data = None
+        if payload is not None:
+            data = _dumps(payload)
+            if self.compress_requests and len(data) > COMPRESS_MIN_BYTES:
+                data = gzip.compress(data, compresslevel=1)
+                headers["Content-Encoding"] = "gzip"
+        url = f"{self.base_url}{path}"
+        if self.transport == "httpx":
+            response = self._session.post(url, content=data, headers=headers, **kwargs)
+        else:
+            response = self._session.post(url, data=data, headers=headers, **kwargs)
+        try:
+            response.raise_for_status()
+        except Exception:
+            response.close()
+            raise
+        return response
     
-    def reload_identities(self) -> Dict[str, Any]:
-        """Reload the identity bank from the data source."""
-        response = requests.post(f"{self.base_url}/identities/reload")
+    def _cached_get(self, path: str, ttl: float) -> Any:
+        """GET ``path`` and return its JSON, reusing a result younger than ``ttl`` seconds.
+
+        Callers get a deep copy, so mutating a result never alters the cache.
+        """
+        now = time.monotonic()
+        entry = self._cache.get(path)
+        if entry is not None and now - entry[0] < ttl:
+            return copy.deepcopy(entry[1])
+        response = self._session.get(f"{self.base_url}{path}")
         response.raise_for_status()
-        return response.json()
+        data = _loads(response.content)
+        self._cache[path] = (now, data)
+        return copy.deepcopy(data)
+    
+    def clear_cache(self) -> None:
+        """Forget all cached GET and prediction responses."""
+        self._cache.clear()
+        with self._predict_cache_lock:
+            self._predict_cache.clear()
+    
+    def _cached_prediction(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached prediction for ``key`` if still fresh."""
+        with self._predict_cache_lock:
+            entry = self._predict_cache.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] >= PREDICT_CACHE_TTL:
+                del self._predict_cache[key]
+                return None
+            self._predict_cache.move_to_end(key)
+            return copy.deepcopy(entry[1])
+    
+    def _store_prediction(self, key: str, result: Dict[str, Any]) -> None:
+        """Cache ``result`` under ``key``, evicting the least recently used entry."""
+        with self._predict_cache_lock:
+            self._predict_cache[key] = (time.monotonic(), copy.deepcopy(result))
+            self._predict_cache.move_to_end(key)
+            while len(self._predict_cache) > PREDICT_CACHE_SIZE:
+                self._predict_cache.popitem(last=False)
+    
+    def health_check(self, ttl: float = 5) -> Dict[str, Any]:
+        """Check API health status (cached for ``ttl`` seconds)."""
+        return self._cached_get("/health", ttl)
+    
+    def list_providers(self, ttl: float = 300) -> Dict[str, Any]:
+        """Get available providers and platforms (cached for ``ttl`` seconds)."""
+        return self._cached_get("/providers", ttl)
+    
+    def get_identities(self, ttl: float = 60) -> Dict[str, Any]:
+        """Get the identity bank configuration (cached for ``ttl`` seconds)."""
+        return self._cached_get("/identities", ttl)
+    
+    def reload_identities(self, fire_and_forget: bool = False) -> Dict[str, Any]:
+        """Reload the identity bank from the data source.
+        
+        Args:
+            fire_and_forget: Only check for a 2xx status and return
+                ``{"ok": True}`` without decoding the response body.
+        """
+        response = self._post("/identities/reload")
+        self._cache.pop("/identities", None)
+        if fire_and_forget:
+            # The (non-streamed) body is already read, so the connection is
+            # back in the pool; just skip the JSON decode
+            response.close()
+            return {"ok": True}
+        return _loads(response.content)
+    
+    @staticmethod
+    def _ctr_payload(
+        ad_text: str,
+        ad_platform: str,
+        population_size: int,
+        provider: str,
+        model: str,
+        use_mock: bool,
+        extra: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Build the JSON body for a /predict-ctr request.
+        
+        ``extra`` is the caller's ``**kwargs`` dict, passed as-is so it is
+        unpacked only once, into the payload itself.
+        """
+        payload = {
+            "ad_text": ad_text,
+            "ad_platform": ad_platform,
+            "population_size": population_size,
+            "provider": provider,
+            "use_mock": use_mock,
+            **extra
+        }
+        
+        if model:
+            payload["model"] = model
+        
+        return payload
     
     def predict_ctr(
         self,
@@ -53,6 +286,7 @@ class CTRApiClient:
         model: str = None,
         use_mock: bool = False,
         include_details: bool = False,
+        idempotency_key: Optional[str] = None,
         **kwargs
     ) -> Dict[str, Any]:
         """Predict CTR for an advertisement.
@@ -65,171 +299,323 @@ class CTRApiClient:
             model: Model name (optional).
             use_mock: Whether to use mock predictions.
             include_details: Whether to include detailed per-identity results.
+            idempotency_key: Key identifying this request across retries (generated if omitted).
             **kwargs: Additional parameters.
             
         Returns:
             CTR prediction results.
         """
-        payload = {
-            "ad_text": ad_text,
-            "ad_platform": ad_platform,
-            "population_size": population_size,
-            "provider": provider,
-            "use_mock": use_mock,
-            **kwargs
-        }
+        payload = self._ctr_payload(ad_text, ad_platform, population_size, provider, model, use_mock, kwargs)
         
-        if model:
-            payload["model"] = model
+        params = INCLUDE_DETAILS_PARAMS if include_details else None
         
-        params = {"include_details": include_details} if include_details else {}
+        cache_key = None
+        if self.enable_cache:
+            cache_key = hashlib.blake2b(
+                json.dumps([payload, include_details], sort_keys=True).encode("utf-8"),
+                digest_size=16,
+            ).hexdigest()
+            cached = self._cached_prediction(cache_key)
+            if cached is not None:
+                cached["cache_hit"] = True
+                return cached
         
-        response = requests.post(
-            f"{self.base_url}/predict-ctr",
-            json=payload,
-            params=params
+        response = self._post("/predict-ctr", payload, idempotency_key, params=params)
+        result = _loads(response.content)
+        if cache_key is not None:
+            self._store_prediction(cache_key, result)
+            result["cache_hit"] = False
+        return result
+    
+    def predict_ctr_stream(
+        self,
+        ad_text: str,
+        ad_platform: str = "facebook",
+        population_size: int = 1000,
+        provider: str = "openai",
+        model: str = None,
+        use_mock: bool = False,
+        max_details: int = 5,
+        idempotency_key: Optional[str] = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """Predict CTR with detailed results, keeping only the first few records.
+        
+        The response body is parsed incrementally with ``ijson``. Once
+        ``max_details`` per-identity records have been read the rest of the
+        body is not downloaded. The summary fields precede
+        ``detailed_results`` in the response, so they are always complete.
+        Without ``ijson`` installed, or with the httpx transport, the full
+        response is parsed and trimmed.
+        
+        Args:
+            ad_text: Advertisement text to evaluate.
+            ad_platform: Platform where ad is shown.
+            population_size: Number of identities to sample.
+            provider: LLM provider to use.
+            model: Model name (optional).
+            use_mock: Whether to use mock predictions.
+            max_details: Maximum number of detailed records to return.
+            idempotency_key: Key identifying this request across retries (generated if omitted).
+            **kwargs: Additional parameters.
+            
+        Returns:
+            CTR prediction results with at most ``max_details`` detailed results.
+        """
+        payload = self._ctr_payload(ad_text, ad_platform, population_size, provider, model, use_mock, kwargs)
+        
+        streaming = ijson is not None and self.transport == "requests"
+        response = self._post(
+            "/predict-ctr",
+            payload,
+            idempotency_key,
+            params=INCLUDE_DETAILS_PARAMS,
+            **({"stream": True} if streaming else {})
         )
-        response.raise_for_status()
-        return response.json()
+        try:
+            if not streaming:
+                result = _loads(response.content)
+                if result.get("detailed_results") is not None:
+                    result["detailed_results"] = result["detailed_results"][:max_details]
+                return result
+            
+            response.raw.decode_content = True
+            return self._read_detailed_stream(response.raw, max_details)
+        finally:
+            response.close()
+    
+    @staticmethod
+    def _read_detailed_stream(raw, max_details: int) -> Dict[str, Any]:
+        """Parse a /predict-ctr response, stopping after ``max_details`` records."""
+        result: Dict[str, Any] = {}
+        details: List[Dict[str, Any]] = []
+        builder = None
+        key = None
+        
+        for prefix, event, value in ijson.parse(raw, use_float=True):
+            if prefix == "detailed_results.item":
+                if event == "start_map":
+                    if len(details) >= max_details:
+                        break
+                    builder = ObjectBuilder()
+                builder.event(event, value)
+                if event == "end_map":
+                    details.append(builder.value)
+                    builder = None
+                    if len(details) >= max_details:
+                        break
+            elif builder is not None:
+                builder.event(event, value)
+            elif prefix == "detailed_results" and event == "start_array":
+                result["detailed_results"] = details
+            elif prefix == "" and event == "map_key":
+                key = value
+            elif prefix == key and event in ("null", "boolean", "integer", "double", "number", "string"):
+                result[key] = value
+        
+        return result
     
-    def predict_ctr_batch(self, requests_list: list) -> list:
+    def predict_ctr_many(self, payloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Run several independent CTR predictions concurrently.
+        
+        Each request goes through the pooled session on its own worker
+        thread, so the total wait is roughly the slowest call rather than
+        the sum of all calls.
+        
+        Args:
+            payloads: List of keyword-argument dicts for :meth:`predict_ctr`.
+            
+        Returns:
+            CTR prediction results in the same order as ``payloads``.
+        """
+        if not payloads:
+            return []
+        
+        results: List[Dict[str, Any]] = [None] * len(payloads)
+        # Stays within the adapter's pool_maxsize so workers don't queue on connections
+        with ThreadPoolExecutor(max_workers=min(16, len(payloads))) as pool:
+            futures = {
+                pool.submit(self.predict_ctr, **payload): i
+                for i, payload in enumerate(payloads)
+            }
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+        return results
+    
+    def predict_ctr_batch(self, requests_list: list, idempotency_key: Optional[str] = None) -> list:
         """Predict CTR for multiple advertisements.
         
+        Lists longer than the server's ``MAX_BATCH_SIZE`` limit are split into
+        consecutive sub-batches that are sent concurrently; results are
+        returned in the input order.
+        
         Args:
             requests_list: List of request dictionaries.
+            idempotency_key: Key identifying this request across retries
+                (generated if omitted); sub-batches get ``<key>-<n>``.
             
         Returns:
             List of CTR prediction results.
         """
-        response = requests.post(
-            f"{self.base_url}/predict-ctr-batch",
-            json=requests_list
-        )
-        response.raise_for_status()
-        return response.json()
+        partitions = [
+            list(range(start, min(start + MAX_BATCH_SIZE, len(requests_list))))
+            for start in range(0, len(requests_list), MAX_BATCH_SIZE)
+        ]
+        if len(partitions) <= 1:
+            response = self._post("/predict-ctr-batch", requests_list, idempotency_key)
+            return _loads(response.content)
+        
+        def post_partition(n: int, indices: List[int]) -> list:
+            key = f"{idempotency_key}-{n}" if idempotency_key else None
+            response = self._post("/predict-ctr-batch", [requests_list[i] for i in indices], key)
+            return _loads(response.content)
+        
+        results: list = [None] * len(requests_list)
+        with ThreadPoolExecutor(max_workers=min(16, len(partitions))) as pool:
+            futures = {
+                pool.submit(post_partition, n, indices): indices
+                for n, indices in enumerate(partitions)
+            }
+            for future in as_completed(futures):
+                for i, result in zip(futures[future], future.result()):
+                    results[i] = result
+        return results
 
 
 def main():
     """Example usage of the CTR API client."""
     
     # Initialize client
-    client = CTRApiClient()
-    
-    try:
-        # Check API health
-        print("Checking API health...")
-        health = client.health_check()
-        print(f"API Status: {health['status']}")
-        print(f"Available providers: {', '.join(health['available_providers'])}")
-        print()
-        
-        # Get provider information
-        print("Getting provider information...")
-        providers = client.list_providers()
-        print("Available providers:")
-        for provider, info in providers["available_providers"].items():
-            print(f"  - {provider}: {info['description']} (default: {info['default_model']})")
-        print(f"Supported platforms: {', '.join(providers['platforms'])}")
-        print()
-        
-        # Get identity bank information
-        print("Getting identity bank information...")
+    with CTRApiClient() as client, ThreadPoolExecutor(max_workers=6) as pool:
         try:
-            identities = client.get_identities()
-            print(f"Identity bank loaded from: {identities.get('source', 'unknown')}")
-            bank = identities['identity_bank']
-            print("Available identity categories:")
-            for category in bank.keys():
-                print(f"  - {category}")
+            # None of the calls below depend on each other, so start them all
+            # at once and print the results in order as they are needed
+            health_future = pool.submit(client.health_check)
+            providers_future = pool.submit(client.list_providers)
+            identities_future = pool.submit(client.get_identities)
+            examples_future = pool.submit(client.predict_ctr_many, [
+                {
+                    "ad_text": "Special 0% APR credit card offer for travel rewards",
+                    "ad_platform": "facebook",
+                    "population_size": 100,
+                    "use_mock": True
+                },
+                {
+                    "ad_text": "Latest smartphone with AI camera features",
+                    "ad_platform": "tiktok",
+                    "population_size": 200,
+                    "use_mock": True
+                }
+            ])
+            batch_requests = [
+                {
+                    "ad_text": "Premium coffee subscription service",
+                    "ad_platform": "facebook",
+                    "population_size": 50,
+                    "use_mock": True
+                },
+                {
+                    "ad_text": "Eco-friendly cleaning products",
+                    "ad_platform": "amazon",
+                    "population_size": 50,
+                    "use_mock": True
+                }
+            ]
+            batch_future = pool.submit(client.predict_ctr_batch, batch_requests)
+            detailed_future = pool.submit(
+                client.predict_ctr_stream,
+                ad_text="Affordable health insurance plans",
+                population_size=20,
+                use_mock=True,
+                max_details=5
+            )
+            
+            # Check API health
+            print("Checking API health...")
+            health = health_future.result()
+            print(f"API Status: {health['status']}")
+            print(f"Available providers: {', '.join(health['available_providers'])}")
             print()
-        except Exception as e:
-            print(f"Could not load identity bank: {e}")
+        
+            # Get provider information
+            print("Getting provider information...")
+            providers = providers_future.result()
+            print("Available providers:")
+            for provider, info in providers["available_providers"].items():
+                print(f"  - {provider}: {info['description']} (default: {info['default_model']})")
+            print(f"Supported platforms: {', '.join(providers['platforms'])}")
             print()
         
-        print(f"Supported platforms: {', '.join(providers['platforms'])}")
-        print()
+            # Get identity bank information
+            print("Getting identity bank information...")
+            try:
+                identities = identities_future.result()
+                print(f"Identity bank loaded from: {identities.get('source', 'unknown')}")
+                bank = identities['identity_bank']
+                print("Available identity categories:")
+                for category in bank.keys():
+                    print(f"  - {category}")
+                print()
+            except Exception as e:
+                print(f"Could not load identity bank: {e}")
+                print()
         
-        # Example 1: Basic CTR prediction with mock
-        print("Example 1: Basic CTR prediction (mock mode)")
-        result = client.predict_ctr(
-            ad_text="Special 0% APR credit card offer for travel rewards",
-            ad_platform="facebook",
-            population_size=100,
-            use_mock=True
-        )
+            print(f"Supported platforms: {', '.join(providers['platforms'])}")
+            print()
         
-        print(f"CTR: {result['ctr']}")
-        print(f"Clicks: {result['total_clicks']}/{result['total_identities']}")
-        print(f"Runtime: {result['runtime_seconds']}s")
-        print(f"Provider: {result['provider_used']}")
-        print()
-        
-        # Example 2: Different platform
-        print("Example 2: TikTok platform prediction (mock mode)")
-        result = client.predict_ctr(
-            ad_text="Latest smartphone with AI camera features",
-            ad_platform="tiktok",
-            population_size=200,
-            use_mock=True
-        )
+            basic_result, tiktok_result = examples_future.result()
         
-        print(f"CTR: {result['ctr']}")
-        print(f"Platform: {result['ad_platform']}")
-        print(f"Processing: {result['processing_mode']}")
-        print()
-        
-        # Example 3: Batch prediction
-        print("Example 3: Batch prediction (mock mode)")
-        batch_requests = [
-            {
-                "ad_text": "Premium coffee subscription service",
-                "ad_platform": "facebook",
-                "population_size": 50,
-                "use_mock": True
-            },
-            {
-                "ad_text": "Eco-friendly cleaning products",
-                "ad_platform": "amazon",
-                "population_size": 50,
-                "use_mock": True
-            }
-        ]
+            # Example 1: Basic CTR prediction with mock
+            print("Example 1: Basic CTR prediction (mock mode)")
+            result = basic_result
         
-        batch_results = client.predict_ctr_batch(batch_requests)
-        
-        for i, result in enumerate(batch_results):
-            if result.get("success", True):
-                print(f"  Ad {i+1}: CTR = {result['ctr']}, Platform = {result['ad_platform']}")
-            else:
-                print(f"  Ad {i+1}: Error - {result.get('error', 'Unknown error')}")
-        print()
-        
-        # Example 4: Detailed results (first few only)
-        print("Example 4: Prediction with detailed results (first 5 identities)")
-        result = client.predict_ctr(
-            ad_text="Affordable health insurance plans",
-            population_size=20,
-            use_mock=True,
-            include_details=True
-        )
+            print(f"CTR: {result['ctr']}")
+            print(f"Clicks: {result['total_clicks']}/{result['total_identities']}")
+            print(f"Runtime: {result['runtime_seconds']}s")
+            print(f"Provider: {result['provider_used']}")
+            print()
         
-        print(f"Overall CTR: {result['ctr']}")
-        if result.get("detailed_results"):
-            print("Sample detailed results:")
-            for detail in result["detailed_results"][:5]:
-                profile = detail["profile"]
-                click = detail["click_prediction"]
-                print(f"  ID {detail['id']}: {profile['gender']}, {profile['age']}, "
-                      f"{profile['occupation']} -> Click: {click}")
-        
-    except requests.exceptions.ConnectionError:
-        print("Error: Could not connect to API server.")
-        print("Make sure the server is running: python api.py")
-    except requests.exceptions.HTTPError as e:
-        print(f"HTTP Error: {e}")
-        print(f"Response: {e.response.text}")
-    except Exception as e:
-        print(f"Error: {e}")
+            # Example 2: Different platform
+            print("Example 2: TikTok platform prediction (mock mode)")
+            result = tiktok_result
+        
+            print(f"CTR: {result['ctr']}")
+            print(f"Platform: {result['ad_platform']}")
+            print(f"Processing: {result['processing_mode']}")
+            print()
+        
+            # Example 3: Batch prediction
+            print("Example 3: Batch prediction (mock mode)")
+            batch_results = batch_future.result()
+        
+            for i, result in enumerate(batch_results):
+                if result.get("success", True):
+                    print(f"  Ad {i+1}: CTR = {result['ctr']}, Platform = {result['ad_platform']}")
+                else:
+                    print(f"  Ad {i+1}: Error - {result.get('error', 'Unknown error')}")
+            print()
+        
+            # Example 4: Detailed results (first few only)
+            print("Example 4: Prediction with detailed results (first 5 identities)")
+            result = detailed_future.result()
+        
+            print(f"Overall CTR: {result['ctr']}")
+            if result.get("detailed_results"):
+                print("Sample detailed results:")
+                for detail in result["detailed_results"][:5]:
+                    profile = detail["profile"]
+                    click = detail["click_prediction"]
+                    print(f"  ID {detail['id']}: {profile['gender']}, {profile['age']}, "
+                          f"{profile['occupation']} -> Click: {click}")
+        
+        except requests.exceptions.ConnectionError:
+            print("Error: Could not connect to API server.")
+            print("Make sure the server is running: python api.py")
+        except requests.exceptions.HTTPError as e:
+            print(f"HTTP Error: {e}")
+            print(f"Response: {e.response.text}")
+        except Exception as e:
+            print(f"Error: {e}")
 
 
 if __name__ == "__main__":
@@ -8,52 +8,60 @@ and the new API endpoints.
 import os
 import json
 import requests
-from typing import Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+from urllib.parse import urlsplit
+
+from requests.adapters import HTTPAdapter
 
 # Configuration
 API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8080")
 
+# One session shared by all tests so they reuse a single keep-alive connection
+SESSION = requests.Session()
+SESSION.mount(f"{urlsplit(API_BASE_URL).scheme}://", HTTPAdapter(pool_maxsize=4))
+
 
-def test_identities_endpoint():
+def test_identities_endpoint() -> Tuple[bool, List[str]]:
     """Test the /identities endpoint."""
-    print("Testing /identities endpoint...")
+    lines = ["Testing /identities endpoint..."]
     try:
-        response = requests.get(f"{API_BASE_URL}/identities")
+        response = SESSION.get(f"{API_BASE_URL}/identities")
         if response.status_code == 200:
             data = response.json()
-            print(f"✅ Identity bank loaded from: {data.get('source', 'unknown')}")
+            lines.append(f"✅ Identity bank loaded from: {data.get('source', 'unknown')}")
             bank = data.get('identity_bank', {})
-            print(f"   Categories available: {list(bank.keys())}")
-            return True
+            lines.append(f"   Categories available: {list(bank.keys())}")
+            return True, lines
         else:
-            print(f"❌ Request failed: {response.status_code} - {response.text}")
-            return False
+            lines.append(f"❌ Request failed: {response.status_code} - {response.text}")
+            return False, lines
     except Exception as e:
-        print(f"❌ Error: {e}")
-        return False
+        lines.append(f"❌ Error: {e}")
+        return False, lines
 
 
-def test_reload_endpoint():
+def test_reload_endpoint() -> Tuple[bool, List[str]]:
     """Test the /identities/reload endpoint."""
-    print("\nTesting /identities/reload endpoint...")
+    lines = ["\nTesting /identities/reload endpoint..."]
     try:
-        response = requests.post(f"{API_BASE_URL}/identities/reload")
+        response = SESSION.post(f"{API_BASE_URL}/identities/reload")
         if response.status_code == 200:
             data = response.json()
-            print(f"✅ Identity bank reloaded from: {data.get('source', 'unknown')}")
-            print(f"   Message: {data.get('message', 'No message')}")
-            return True
+            lines.append(f"✅ Identity bank reloaded from: {data.get('source', 'unknown')}")
+            lines.append(f"   Message: {data.get('message', 'No message')}")
+            return True, lines
         else:
-            print(f"❌ Request failed: {response.status_code} - {response.text}")
-            return False
+            lines.append(f"❌ Request failed: {response.status_code} - {response.text}")
+            return False, lines
     except Exception as e:
-        print(f"❌ Error: {e}")
-        return False
+        lines.append(f"❌ Error: {e}")
+        return False, lines
 
 
-def test_prediction_with_gcs():
+def test_prediction_with_gcs() -> Tuple[bool, List[str]]:
     """Test CTR prediction to ensure GCS integration doesn't break existing functionality."""
-    print("\nTesting CTR prediction with GCS integration...")
+    lines = ["\nTesting CTR prediction with GCS integration..."]
     try:
         payload = {
             "ad_text": "Test advertisement for cloud storage integration",
@@ -61,40 +69,45 @@ def test_prediction_with_gcs():
             "use_mock": True
         }
         
-        response = requests.post(f"{API_BASE_URL}/predict-ctr", json=payload)
+        response = SESSION.post(f"{API_BASE_URL}/predict-ctr", json=payload)
         if response.status_code == 200:
             data = response.json()
-            print(f"✅ CTR prediction successful: {data.get('ctr', 'N/A')}")
-            print(f"   Total identities: {data.get('total_identities', 'N/A')}")
-            print(f"   Provider used: {data.get('provider_used', 'N/A')}")
-            return True
+            lines.append(f"✅ CTR prediction successful: {data.get('ctr', 'N/A')}")
+            lines.append(f"   Total identities: {data.get('total_identities', 'N/A')}")
+            lines.append(f"   Provider used: {data.get('provider_used', 'N/A')}")
+            return True, lines
         else:
-            print(f"❌ Request failed: {response.status_code} - {response.text}")
-            return False
+            lines.append(f"❌ Request failed: {response.status_code} - {response.text}")
+            return False, lines
     except Exception as e:
-        print(f"❌ Error: {e}")
-        return False
+        lines.append(f"❌ Error: {e}")
+        return False, lines
 
 
-def test_health_check():
-    """Test the health check endpoint."""
-    print("\nTesting health check...")
+def test_health_check() -> Tuple[bool, List[str]]:
+    """Test the health check endpoint.
+
+    Uses HEAD so no body is transferred; the status code carries the result.
+    """
+    lines = ["\nTesting health check..."]
     try:
-        response = requests.get(f"{API_BASE_URL}/health")
+        response = SESSION.head(f"{API_BASE_URL}/health")
         if response.status_code == 200:
-            data = response.json()
-            print(f"✅ API is healthy: {data.get('status', 'unknown')}")
-            return True
+            lines.append("✅ API is healthy: HEAD /health -> 200")
+            return True, lines
         else:
-            print(f"❌ Health check failed: {response.status_code}")
-            return False
+            lines.append(f"❌ Health check failed: {response.status_code}")
+            return False, lines
     except Exception as e:
-        print(f"❌ Connection error: {e}")
-        return False
-
+        lines.append(f"❌ Connection error: {e}")
+        return False, lines
 
 def main():
-    """Run all tests."""
+    """Run all tests concurrently, printing each test's output in order.
+
+    Each test returns ``(passed, lines)``; output is printed here, after all
+    tests finish, so concurrent tests never interleave.
+    """
     print(f"🧪 Testing Wisteria CTR Studio API at {API_BASE_URL}")
     print("=" * 60)
     
@@ -108,8 +121,13 @@ def main():
     passed = 0
     total = len(tests)
     
-    for test in tests:
-        if test():
+    with SESSION, ThreadPoolExecutor(max_workers=len(tests)) as pool:
+        outcomes = list(pool.map(lambda test: test(), tests))
+    
+    for ok, lines in outcomes:
+        for line in lines:
+            print(line)
+        if ok:
             passed += 1
     
     print("\n" + "=" * 60)